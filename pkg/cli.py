@@ -44,6 +44,20 @@ def main():
         help="Path to Prometheus config YAML file (default: config/prometheus_config.yaml)"
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of queries to run concurrently (default: 1)"
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Per-query timeout in seconds; slower queries are recorded as errors (default: no timeout)"
+    )
+
     args = parser.parse_args()
 
     copilot_modes = get_available_modes()
@@ -57,12 +71,15 @@ def main():
     print(f"[INFO] Running with query set: {args.query_set}")
     print(f"[INFO] Using copilot: {args.copilot}")
     print(f"[INFO] Saving to: {args.output}")
+    print(f"[INFO] Workers: {args.workers}")
 
     run_workflow(
         query_set_path=args.query_set,
         prom_config_path=args.prometheus_config,
         copilot_mode_module=copilot_modes[args.copilot],
-        output_dir=args.output
+        output_dir=args.output,
+        workers=args.workers,
+        timeout=args.timeout
     )
 
 if __name__ == "__main__":
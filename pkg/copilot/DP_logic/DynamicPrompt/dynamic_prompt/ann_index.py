@@ -0,0 +1,181 @@
+import hashlib
+import numpy as np
+from pathlib import Path
+
+import os
+import dotenv
+dotenv.load_dotenv()
+
+ann_target_recall = float(os.getenv("ANN_TARGET_RECALL", "0.95"))
+ann_recall_k = int(os.getenv("ANN_RECALL_K", "5"))
+ann_min_chunks = int(os.getenv("ANN_MIN_CHUNKS", "5000"))
+
+
+def top_k_indices(scores, top_k):
+    """Indices of the top_k highest scores, best first."""
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def ann_index_path(embedding_path):
+    """The ANN index is stored next to, and named after, the embeddings file it was built from."""
+    return Path(embedding_path).with_suffix(".ann.npz")
+
+
+def corpus_hash(chunks, matrix, sample_rows=64):
+    """
+    Fingerprint of an indexed corpus: its chunks, vector shape and a strided
+    sample of vector rows (enough to notice a re-embedding with another
+    model without reading a whole memory-mapped matrix).
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(str(chunk).encode())
+        digest.update(b"\0")
+    digest.update(str(tuple(matrix.shape)).encode())
+    if len(matrix):
+        rows = np.linspace(0, len(matrix) - 1, num=min(sample_rows, len(matrix)), dtype=np.int64)
+        digest.update(np.ascontiguousarray(np.asarray(matrix[rows]), dtype=np.float32).tobytes())
+    return digest.hexdigest()
+
+
+class BruteForceIndex:
+    """Exact search: score every row. Fastest for small corpora."""
+
+    kind = "brute_force"
+
+    def search(self, matrix, query_vector, top_k, n_probe=None):
+        return top_k_indices(matrix @ query_vector, top_k)
+
+    def add(self, vectors):
+        pass
+
+    def remove(self, keep):
+        pass
+
+
+class IVFIndex:
+    """
+    Inverted-file index over L2-normalized vectors.
+
+    Rows are clustered with spherical k-means; a query only scores the rows in
+    the ``n_probe`` lists whose centroids are closest to it. Larger ``n_probe``
+    trades speed for recall (``n_probe == n_lists`` is exact search).
+    """
+
+    kind = "ivf"
+
+    def __init__(self, centroids, assignments, n_probe=8, corpus_hash=None):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+        self.n_probe = max(1, min(int(n_probe), len(self.centroids)))
+        # corpus_hash() of the rows the index was built for; checked on load
+        self.corpus_hash = corpus_hash
+        self._rebuild_lists()
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, matrix, n_lists=None, n_iter=15, sample_size=None, seed=0):
+        """Train centroids with spherical k-means and assign every row to a list."""
+        n_rows = len(matrix)
+        n_lists = n_lists or max(1, int(4 * np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+        rng = np.random.default_rng(seed)
+
+        # Training on a sample is enough to place centroids well
+        sample_size = sample_size or min(n_rows, 64 * n_lists)
+        sample = np.asarray(matrix[np.sort(rng.choice(n_rows, size=sample_size, replace=False))])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = cls._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Re-seed empty lists with random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        return cls(centroids, cls._nearest(matrix, centroids))
+
+    @staticmethod
+    def _nearest(vectors, centroids, batch_size=8192):
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            batch = np.asarray(vectors[start:start + batch_size])
+            labels[start:start + batch_size] = np.argmax(batch @ centroids.T, axis=1)
+        return labels
+
+    def _rebuild_lists(self):
+        # CSR layout: rows of list l are order[offsets[l]:offsets[l + 1]]
+        self._order = np.argsort(self.assignments, kind="stable")
+        self._offsets = np.searchsorted(self.assignments[self._order], np.arange(self.n_lists + 1))
+
+    def search(self, matrix, query_vector, top_k, n_probe=None):
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        probe = top_k_indices(self.centroids @ query_vector, n_probe)
+        candidates = np.sort(np.concatenate(
+            [self._order[self._offsets[l]:self._offsets[l + 1]] for l in probe]
+        ))
+        if len(candidates) == 0:
+            return candidates
+        scores = np.asarray(matrix[candidates]) @ query_vector
+        return candidates[top_k_indices(scores, top_k)]
+
+    def add(self, vectors):
+        """Assign newly appended rows to their nearest lists (no retraining)."""
+        self.assignments = np.concatenate([self.assignments, self._nearest(vectors, self.centroids)])
+        self._rebuild_lists()
+
+    def remove(self, keep):
+        """Keep only the given row positions, matching Retriever.remove_chunks."""
+        self.assignments = self.assignments[keep]
+        self._rebuild_lists()
+
+    def save(self, filepath):
+        np.savez(filepath, centroids=self.centroids, assignments=self.assignments, n_probe=self.n_probe,
+                 corpus_hash=self.corpus_hash or "")
+
+    @classmethod
+    def load(cls, filepath):
+        data = np.load(filepath)
+        stored_hash = str(data["corpus_hash"]) if "corpus_hash" in data.files else None
+        return cls(data["centroids"], data["assignments"], int(data["n_probe"]), stored_hash or None)
+
+
+def recall_at_k(index, matrix, k=ann_recall_k, n_queries=200, n_probe=None, seed=0):
+    """
+    Mean recall@k of index against exact search, using perturbed corpus rows
+    as queries.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(matrix), size=min(n_queries, len(matrix)), replace=False)
+    exact = BruteForceIndex()
+    hits = 0
+    for row in rows:
+        query = np.asarray(matrix[row]) + rng.normal(0, 0.05, matrix.shape[1]).astype(np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        expected = set(exact.search(matrix, query, k).tolist())
+        found = set(index.search(matrix, query, k, n_probe=n_probe).tolist())
+        hits += len(expected & found)
+    return hits / (len(rows) * min(k, len(matrix)))
+
+
+def tune_n_probe(index, matrix, target_recall=ann_target_recall, k=ann_recall_k):
+    """Pick the smallest n_probe whose measured recall@k reaches target_recall."""
+    n_probe = 1
+    while True:
+        recall = recall_at_k(index, matrix, k=k, n_probe=n_probe)
+        if recall >= target_recall or n_probe >= index.n_lists:
+            index.n_probe = n_probe
+            return n_probe, recall
+        n_probe = min(n_probe * 2, index.n_lists)
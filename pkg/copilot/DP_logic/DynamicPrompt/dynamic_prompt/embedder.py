@@ -1,15 +1,89 @@
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
+from collections import OrderedDict
+from threading import Lock
+
+import os
+import dotenv
+dotenv.load_dotenv()
+
+embed_cache_size = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+
+# One SentenceTransformer per model name for the whole process
+_models = {}
+_models_lock = Lock()
+
+
+def normalize_question(text):
+    """
+    Cache key for a question: lowercased with collapsed whitespace.
+
+    The default model (all-MiniLM-L6-v2) is uncased and ignores extra
+    whitespace, so this does not change the resulting embedding.
+    """
+    return " ".join(str(text).lower().split())
+
 
 class Embedder:
-    def __init__(self, model="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model)
+    # Shared across instances: (model name, normalized question) -> vector
+    _query_cache = OrderedDict()
+    _query_cache_lock = Lock()
+    query_cache_hits = 0
+    query_cache_misses = 0
+
+    def __init__(self, model="all-MiniLM-L6-v2", cache_size=embed_cache_size):
+        self.model_name = model
+        self.cache_size = cache_size
+        with _models_lock:
+            if model not in _models:
+                _models[model] = SentenceTransformer(model)
+            self.model = _models[model]
 
     def embed_chunks(self, chunks):
         # Returns a list of embedding vectors for each chunk
         return self.model.encode(chunks, convert_to_numpy=True).tolist()
 
+    def embed_queries(self, questions):
+        """
+        Embed many questions in one forward pass, reusing cached vectors.
+
+        Returns a float32 array with one row per question, in input order.
+        """
+        keys = [(self.model_name, normalize_question(q)) for q in questions]
+        cache = Embedder._query_cache
+
+        with Embedder._query_cache_lock:
+            missing = [key for key in dict.fromkeys(keys) if key not in cache]
+            Embedder.query_cache_hits += len(keys) - len(missing)
+            Embedder.query_cache_misses += len(missing)
+
+        if missing:
+            vectors = self.model.encode([text for _, text in missing], convert_to_numpy=True)
+            with Embedder._query_cache_lock:
+                for key, vector in zip(missing, vectors):
+                    cache[key] = np.asarray(vector, dtype=np.float32)
+
+        with Embedder._query_cache_lock:
+            rows = []
+            for key in keys:
+                vector = cache.get(key)
+                if vector is None:
+                    # Evicted by a concurrent caller between the two steps
+                    vector = np.asarray(self.model.encode([key[1]], convert_to_numpy=True)[0], dtype=np.float32)
+                    cache[key] = vector
+                cache.move_to_end(key)
+                rows.append(vector)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+        if not rows:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack(rows)
+
+    def embed_query(self, question):
+        return self.embed_queries([question])[0]
+
     def save_embeddings(self, chunks, filepath="config/embeddings/embeddings.npz"):
         config_dir = "/".join(filepath.split("/")[:-1])
         if not Path(config_dir).exists():
@@ -0,0 +1,82 @@
+import hashlib
+import numpy as np
+from pathlib import Path
+from threading import Lock
+from .embedder import Embedder
+from .retriever import Retriever
+
+_shared_selectors = {}
+_shared_lock = Lock()
+
+
+def examples_cache_path(examples_path):
+    """Example embeddings are cached next to the JSON they were built from."""
+    return Path(examples_path).with_suffix(".npz")
+
+
+def source_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+class ExampleSelector:
+    """
+    Picks the golden examples whose questions are most similar to a user question.
+
+    Example questions are embedded into a Retriever index cached on disk
+    beside the examples JSON. The cache records a hash of the JSON it was
+    built from; when the JSON changes, only added questions are embedded
+    and removed ones dropped. Use ``ExampleSelector.shared()`` to reuse one
+    selector per examples file across the process. The examples path and
+    top_k come from the PromptBuilder (EXAMPLES_PATH, EXAMPLES_TOP_K).
+    """
+
+    def __init__(self, examples, examples_path, embedder=None):
+        self.examples_path = examples_path
+        self._embedder = embedder
+        # The index stores question texts; map them back to their examples
+        self.by_question = {}
+        for example in examples:
+            self.by_question.setdefault(str(example.get("question", "")), example)
+        self.retriever = self._load_retriever() if self.by_question else None
+
+    @classmethod
+    def shared(cls, examples, examples_path):
+        """Return a process-wide selector for examples_path, rebuilding it when the file changes."""
+        mtime = Path(examples_path).stat().st_mtime_ns
+        with _shared_lock:
+            entry = _shared_selectors.get(examples_path)
+            if entry is None or entry[0] != mtime:
+                entry = (mtime, cls(examples, examples_path))
+                _shared_selectors[examples_path] = entry
+            return entry[1]
+
+    def _load_retriever(self):
+        cache_path = examples_cache_path(self.examples_path)
+        digest = source_hash(self.examples_path)
+        questions = list(self.by_question)
+
+        if cache_path.exists():
+            retriever = Retriever(str(cache_path), mmap=False, embedder=self._embedder)
+            cached = np.load(cache_path)
+            if "source_hash" in cached.files and str(cached["source_hash"]) == digest:
+                return retriever
+            retriever.remove_chunks(set(retriever.chunks) - set(questions))
+            retriever.add_chunks(questions)
+        else:
+            embedder = self._embedder or Embedder()
+            self._save(cache_path, embedder.embed_chunks(questions), questions, digest)
+            return Retriever(str(cache_path), mmap=False, embedder=embedder)
+
+        self._save(cache_path, retriever.matrix, retriever.chunks, digest)
+        return retriever
+
+    @staticmethod
+    def _save(cache_path, matrix, chunks, digest):
+        np.savez_compressed(cache_path, vectors=np.asarray(matrix), chunks=np.asarray(chunks, dtype=str),
+                            source_hash=digest)
+
+    def select(self, question, top_k):
+        """The top_k examples most similar to question, best match first."""
+        if self.retriever is None:
+            return []
+        return [self.by_question[q] for q in self.retriever.query(question, top_k)]
@@ -1,5 +1,8 @@
 import json
+import logging
+import time
 from pathlib import Path
+from threading import Lock
 from jinja2 import Template
 from datetime import datetime
 
@@ -11,20 +14,144 @@ template_dir = os.getenv("TEMPLATE_PATH")
 override_path = os.getenv("OVERRIDE_PATH")
 examples_path = os.getenv("EXAMPLES_PATH")
 info_path = os.getenv("INFO_PATH")
+# Golden examples per prompt, chosen by similarity to the question; 0 uses all of them
+examples_top_k = int(os.getenv("EXAMPLES_TOP_K", "3"))
+# Approximate prompt size limit in tokens; 0 means no limit
+prompt_token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+
+CHARS_PER_TOKEN = 4
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TEMPLATE = """
+{{ system }}
+
+{{ domain }}
+
+{% for example in golden_examples %}
+Example:
+Q: {{ example.question }}
+A: {{ example.answer }}
+{% endfor %}
+
+{% if context_chunks %}
+Relevant Prometheus Metrics:
+{% for chunk in context_chunks %}
+{{ chunk }}
+{% endfor %}
+{% endif %}
+
+{% if additional_info %}
+Additional Information:
+{% for key, value in additional_info.items() %}
+{{ key }}: {{ value }}
+{% endfor %}
+{% endif %}
+
+User question:
+{{ user_question }}
+
+{{ postamble }}
+{{ overrides_text }}
+"""
+
+_compiled_prompt_template = Template(PROMPT_TEMPLATE)
+_compiled_templates = {}
+_file_cache = {}
+_cache_lock = Lock()
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def cached_file(path, parse):
+    """
+    Return parse(text) for path, re-reading only when the file's mtime changes.
+
+    Returns None for missing files. Parsed values are shared between callers,
+    so treat them as read-only.
+    """
+    path = Path(path)
+    mtime = _mtime(path)
+    key = (str(path), parse)
+    with _cache_lock:
+        entry = _file_cache.get(key)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+    value = parse(path.read_text()) if mtime is not None else None
+    with _cache_lock:
+        _file_cache[key] = (mtime, value)
+    return value
+
+
+def _parse_json(text):
+    content = text.strip()
+    return json.loads(content) if content else None
+
+
+def cached_sections(template_dir):
+    """Load every *.md section in template_dir, reloading only changed files."""
+    directory = Path(template_dir)
+    dir_mtime = _mtime(directory)
+    key = (str(directory), "sections")
+    with _cache_lock:
+        entry = _file_cache.get(key)
+    # The directory mtime changes when section files are added or removed
+    if entry is None or entry[0] != dir_mtime:
+        files = sorted(directory.glob("*.md"))
+        with _cache_lock:
+            _file_cache[key] = (dir_mtime, files)
+    else:
+        files = entry[1]
+    return {file.stem: cached_file(file, str) for file in files}
+
+
+def estimate_tokens(text):
+    """Rough token count (characters / 4); good enough to size prompts against a context window."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compiled_template(source):
+    """Compile a Jinja2 template once per distinct source text."""
+    with _cache_lock:
+        template = _compiled_templates.get(source)
+        if template is None:
+            template = Template(source)
+            _compiled_templates[source] = template
+        return template
+
 
 class PromptBuilder:
+    """
+    Assembles the PromQL generation prompt from template sections.
+
+    With a token budget (``PROMPT_TOKEN_BUDGET`` or ``with_token_budget``)
+    the required parts (system, domain, question, postamble and overrides)
+    are always included. The remaining budget is then filled in priority
+    order: retrieved context chunks (best match first), golden examples,
+    additional info. Each stops at the first item that no longer fits.
+    ``token_count`` and ``section_tokens`` describe the last built prompt.
+    """
+
     def __init__(self, template_dir=template_dir):
         self.sections = {}
+        self.last_build_us = None
         self.load_sections(template_dir)
         self.context_chunks = []
         self.user_question = ""
         self.overrides = {}
         self.golden_examples = []
         self.additional_info = {}
+        self.token_budget = prompt_token_budget
+        self.token_count = None
+        self.section_tokens = {}
 
     def load_sections(self, template_dir):
-        for file in Path(template_dir).glob("*.md"):
-            self.sections[file.stem] = file.read_text()
+        self.sections.update(cached_sections(template_dir))
 
     def with_context(self, chunks):
         self.context_chunks = chunks
@@ -35,70 +162,103 @@ class PromptBuilder:
         return self
 
     def with_overrides(self, override_path=override_path):
-        path = Path(override_path)
-        if path.exists():
-            content = path.read_text().strip()
-            if content:
-                self.overrides = json.loads(content)
+        content = cached_file(override_path, _parse_json)
+        if content:
+            self.overrides = content
         return self
 
-    def with_golden_examples(self, examples_path=examples_path):
-        path = Path(examples_path)
-        if path.exists():
-            content = path.read_text().strip()
-            if content:
-                self.golden_examples = json.loads(content)
+    def with_golden_examples(self, examples_path=examples_path, top_k=examples_top_k):
+        """
+        Use the top_k golden examples most similar to the user question.
+
+        Call after with_user_question. With top_k of 0, no question, or no
+        more examples than top_k, every example is used in file order.
+        """
+        content = cached_file(examples_path, _parse_json)
+        if content:
+            if top_k and self.user_question and len(content) > top_k:
+                from .example_selector import ExampleSelector
+                content = ExampleSelector.shared(content, examples_path).select(self.user_question, top_k)
+            self.golden_examples = content
         return self
 
     def with_additional_info(self, info_path=info_path):
-        path = Path(info_path)
-        if path.exists():
-            content = path.read_text().strip()
-            if content:
-                self.additional_info = json.loads(content)
+        content = cached_file(info_path, _parse_json)
+        if content:
+            self.additional_info = content
         return self
 
-    def build(self):
-        now = datetime.utcnow()
-        template = """
-{{ system }}
-
-{{ domain }}
+    def with_token_budget(self, budget):
+        """Limit the prompt to roughly budget tokens (None or 0 for no limit)."""
+        self.token_budget = budget or 0
+        return self
 
-{% for example in golden_examples %}
-Example:
-Q: {{ example.question }}
-A: {{ example.answer }}
-{% endfor %}
+    def _render(self, required, context_chunks, golden_examples, additional_info):
+        return _compiled_prompt_template.render(
+            golden_examples=golden_examples,
+            context_chunks=context_chunks,
+            additional_info=additional_info,
+            **required
+        )
 
-{% if context_chunks %}
-Relevant Prometheus Metrics:
-{% for chunk in context_chunks %}
-{{ chunk }}
-{% endfor %}
-{% endif %}
+    def _fit(self, required):
+        """Pick the optional items that fit in the budget, by section priority."""
+        remaining = self.token_budget - estimate_tokens(self._render(required, [], [], {}))
+        selected = {}
 
-{% if additional_info %}
-Additional Information:
-{% for key, value in additional_info.items() %}
-{{ key }}: {{ value }}
-{% endfor %}
-{% endif %}
+        # (name, items, rendered text of one item, heading added with the first item)
+        sections = [
+            ("context", list(self.context_chunks), lambda chunk: f"{chunk}\n\n", "Relevant Prometheus Metrics:\n\n"),
+            ("examples", list(self.golden_examples),
+             lambda example: f"\nExample:\nQ: {example.get('question', '')}\nA: {example.get('answer', '')}\n", ""),
+            ("additional_info", list(self.additional_info.items()),
+             lambda item: f"{item[0]}: {item[1]}\n\n", "Additional Information:\n\n"),
+        ]
+        for name, items, render_item, heading in sections:
+            kept = []
+            cost = estimate_tokens(heading) if items else 0
+            for item in items:
+                item_cost = estimate_tokens(render_item(item))
+                if cost + item_cost > remaining:
+                    break
+                cost += item_cost
+                kept.append(item)
+            if kept:
+                remaining -= cost
+            selected[name] = kept
+            if len(kept) < len(items):
+                logger.debug(f"Token budget: kept {len(kept)} of {len(items)} {name} items")
 
-User question:
-{{ user_question }}
+        return selected["context"], selected["examples"], dict(selected["additional_info"])
 
-{{ postamble }}
-{{ overrides_text }}
-"""
-        prompt = Template(template).render(
+    def build(self):
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        required = dict(
             system=self.sections.get("system", ""),
             domain=self.sections.get("domain", ""),
-            postamble=Template(self.sections.get("postamble", "")).render(current_time=now.isoformat() + "Z"),
-            golden_examples=self.golden_examples,
-            context_chunks=self.context_chunks,
+            postamble=compiled_template(self.sections.get("postamble", "")).render(current_time=now.isoformat() + "Z"),
             user_question=self.user_question,
             overrides_text="\n".join(f"{k}: {v}" for k, v in self.overrides.items()),
-            additional_info=self.additional_info
         )
-        return prompt
\ No newline at end of file
+
+        if self.token_budget:
+            context_chunks, golden_examples, additional_info = self._fit(required)
+        else:
+            context_chunks, golden_examples, additional_info = \
+                self.context_chunks, self.golden_examples, self.additional_info
+        prompt = self._render(required, context_chunks, golden_examples, additional_info)
+
+        self.token_count = estimate_tokens(prompt)
+        self.section_tokens = {
+            "required": sum(estimate_tokens(text) for text in required.values()),
+            "context": sum(estimate_tokens(str(chunk)) for chunk in context_chunks),
+            "examples": sum(estimate_tokens(f"{e.get('question', '')}{e.get('answer', '')}") for e in golden_examples),
+            "additional_info": sum(estimate_tokens(f"{k}: {v}") for k, v in additional_info.items()),
+        }
+        if self.token_budget and self.token_count > self.token_budget:
+            logger.warning(f"Required prompt sections alone use ~{self.token_count} tokens, "
+                           f"over the budget of {self.token_budget}")
+        self.last_build_us = (time.perf_counter() - started) * 1e6
+        logger.debug(f"Prompt built in {self.last_build_us:.0f} us")
+        return prompt
@@ -1,20 +1,153 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from pathlib import Path
+from threading import Lock
 from .embedder import Embedder
+from .ann_index import BruteForceIndex, IVFIndex, ann_index_path, corpus_hash
 
 import os
 import dotenv
 dotenv.load_dotenv()
 
 embedding_path = os.getenv("EMBEDDING_PATH")
+embedding_mmap = os.getenv("EMBEDDING_MMAP", "false").lower() in ("1", "true", "yes")
+
+_shared_retrievers = {}
+_shared_lock = Lock()
+
+
+def normalize_rows(vectors):
+    """L2-normalize rows into a contiguous float32 matrix (zero rows stay zero)."""
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
 
 class Retriever:
-    def __init__(self, embedding_path=embedding_path):
-        self.vectors, self.chunks = Embedder.load_embeddings(embedding_path)
+    """
+    Top-k chunk retrieval over a single normalized float32 matrix.
+
+    Vectors are normalized once at load time, so cosine similarity is a
+    plain dot product. If an ANN index built by the onboarding CLI sits next
+    to the embeddings file it is used instead of exact search. The embedding
+    model is shared process-wide and query embeddings are cached by the
+    Embedder. Use ``Retriever.shared()`` to reuse one loaded index per
+    embeddings file across the whole process.
+    """
+
+    def __init__(self, embedding_path=embedding_path, mmap=embedding_mmap, embedder=None):
+        self.embedding_path = embedding_path
+        self._embedder = embedder
+        vectors, chunks = Embedder.load_embeddings(embedding_path)
+        self.chunks = [str(chunk) for chunk in chunks]
+
+        if mmap:
+            self.matrix = self._load_mmap(vectors)
+        else:
+            self.matrix = normalize_rows(vectors)
+
+        self._corpus_hash = None
+        self.index = self._load_index()
+
+    @classmethod
+    def shared(cls, embedding_path=embedding_path, mmap=embedding_mmap):
+        """Return a process-wide retriever for embedding_path, loading it on first use."""
+        with _shared_lock:
+            retriever = _shared_retrievers.get(embedding_path)
+            if retriever is None:
+                retriever = cls(embedding_path, mmap=mmap)
+                _shared_retrievers[embedding_path] = retriever
+            return retriever
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = Embedder()
+        return self._embedder
+
+    @property
+    def corpus_hash(self):
+        """corpus_hash() of the loaded chunks and vectors, computed once per change."""
+        if self._corpus_hash is None:
+            self._corpus_hash = corpus_hash(self.chunks, self.matrix)
+        return self._corpus_hash
+
+    def _matrix_path(self):
+        return Path(self.embedding_path).with_suffix(".f32.npy")
+
+    def _load_mmap(self, vectors):
+        # npz archives are compressed and cannot be memory-mapped, so keep a
+        # normalized raw copy next to them and refresh it when it is stale.
+        matrix_path = self._matrix_path()
+        source_mtime = Path(self.embedding_path).stat().st_mtime
+        if not matrix_path.exists() or matrix_path.stat().st_mtime < source_mtime:
+            np.save(matrix_path, normalize_rows(vectors))
+        return np.load(matrix_path, mmap_mode="r")
+
+    def _load_index(self):
+        index_path = ann_index_path(self.embedding_path)
+        if index_path.exists():
+            index = IVFIndex.load(index_path)
+            # An index built for a different corpus would return wrong rows
+            if len(index.assignments) == len(self.chunks) and \
+                    index.corpus_hash == self.corpus_hash:
+                return index
+        return BruteForceIndex()
+
+    def _embed_query(self, input_text):
+        return normalize_rows(self.embedder.embed_query(input_text))[0]
+
+    def prepare(self, questions):
+        """Embed a batch of upcoming questions in one pass so later queries hit the cache."""
+        self.embedder.embed_queries(questions)
 
     def query(self, input_text, top_k=5):
-        embedder = Embedder()
-        query_vector = np.array(embedder.embed_chunks([input_text])[0]).reshape(1, -1)
-        similarities = cosine_similarity(query_vector, np.vstack(self.vectors))
-        top_indices = similarities[0].argsort()[-top_k:][::-1]
-        return [self.chunks[i] for i in top_indices]
\ No newline at end of file
+        if not self.chunks:
+            return []
+        query_vector = self._embed_query(input_text)
+        top_indices = self.index.search(self.matrix, query_vector, top_k)
+        return [self.chunks[i] for i in top_indices]
+
+    def add_chunks(self, chunks):
+        """Embed and append only chunks that are not already indexed."""
+        known = set(self.chunks)
+        new_chunks = [chunk for chunk in dict.fromkeys(chunks) if chunk not in known]
+        if not new_chunks:
+            return 0
+
+        vectors = normalize_rows(self.embedder.embed_chunks(new_chunks))
+        if len(self.chunks):
+            self.matrix = np.vstack([self.matrix, vectors])
+        else:
+            self.matrix = vectors
+        self.index.add(vectors)
+        self.chunks.extend(new_chunks)
+        self._corpus_hash = None
+        return len(new_chunks)
+
+    def remove_chunks(self, chunks):
+        """Drop the given chunks from the index without re-embedding anything."""
+        drop = set(chunks)
+        keep = [i for i, chunk in enumerate(self.chunks) if chunk not in drop]
+        removed = len(self.chunks) - len(keep)
+        if removed:
+            self.matrix = np.ascontiguousarray(self.matrix[keep])
+            self.index.remove(keep)
+            self.chunks = [self.chunks[i] for i in keep]
+            self._corpus_hash = None
+        return removed
+
+    def save(self, filepath=None):
+        filepath = filepath or self.embedding_path
+        Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(filepath, vectors=np.asarray(self.matrix), chunks=self.chunks)
+        if filepath == self.embedding_path and self._matrix_path().exists():
+            # Write beside and swap in, so live memory maps of the old file stay valid
+            tmp_path = self._matrix_path().with_suffix(".tmp.npy")
+            np.save(tmp_path, np.asarray(self.matrix))
+            os.replace(tmp_path, self._matrix_path())
+        if isinstance(self.index, IVFIndex):
+            self.index.corpus_hash = self.corpus_hash
+            self.index.save(ann_index_path(filepath))
@@ -4,6 +4,16 @@ print("🟢 Python version:", sys.version)
 
 from pathlib import Path
 from dynamic_prompt.embedder import Embedder
+from dynamic_prompt.retriever import Retriever
+from dynamic_prompt.ann_index import (
+    IVFIndex,
+    ann_index_path,
+    corpus_hash,
+    ann_min_chunks,
+    ann_recall_k,
+    ann_target_recall,
+    tune_n_probe,
+)
 
 
 def chunk_text_file(filepath):
@@ -21,10 +31,39 @@ def run_onboarding():
         return
 
     chunks = chunk_text_file(source_path)
-    print(f"Chunked {len(chunks)} blocks. Embedding now...")
-    embedder = Embedder()
-    embedder.save_embeddings(chunks, filepath=output_path)
+
+    if Path(output_path).exists():
+        # Only embed lines that changed since the last onboarding run
+        retriever = Retriever(output_path, mmap=False)
+        removed = retriever.remove_chunks(set(retriever.chunks) - set(chunks))
+        added = retriever.add_chunks(chunks)
+        retriever.save(output_path)
+        print(f"Updated embeddings: {added} chunks added, {removed} removed, {len(retriever.chunks)} total")
+    else:
+        print(f"Chunked {len(chunks)} blocks. Embedding now...")
+        embedder = Embedder()
+        embedder.save_embeddings(chunks, filepath=output_path)
     print(f"Embeddings saved to {output_path}")
+    build_ann_index(output_path)
+
+
+def build_ann_index(embedding_path):
+    """Build an IVF index next to the embeddings when the corpus is large enough to need one."""
+    retriever = Retriever(embedding_path, mmap=False)
+    index_path = ann_index_path(embedding_path)
+    if len(retriever.chunks) < ann_min_chunks:
+        if index_path.exists():
+            index_path.unlink()
+        print(f"{len(retriever.chunks)} chunks (< ANN_MIN_CHUNKS={ann_min_chunks}); using exact search.")
+        return
+
+    print(f"Building ANN index over {len(retriever.chunks)} chunks...")
+    index = IVFIndex.build(retriever.matrix)
+    n_probe, recall = tune_n_probe(index, retriever.matrix, target_recall=ann_target_recall, k=ann_recall_k)
+    index.corpus_hash = corpus_hash(retriever.chunks, retriever.matrix)
+    index.save(index_path)
+    print(f"ANN index saved to {index_path}: {index.n_lists} lists, n_probe={n_probe}, "
+          f"recall@{ann_recall_k}={recall:.3f} vs exact search (target {ann_target_recall})")
 
 
 
@@ -1,10 +1,20 @@
 import httpx
+import json
 import re
 import logging
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from threading import Lock
 from prometheus_api_client import PrometheusConnect
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from pathlib import Path
 
+from pkg.copilot.DP_logic.result_compactor import compact_result, compaction_stats
+from pkg.copilot.DP_logic import promql_cache
+
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -22,23 +32,87 @@ def enhanced_prompt_builder(user_prompt):
     from pkg.copilot.DP_logic.DynamicPrompt.dynamic_prompt.retriever import Retriever
 
     question = user_prompt.strip()
-    context = Retriever().query(question)
+    # Loaded once per process: the index and embedding model are reused across questions
+    context = Retriever.shared().query(question)
 
-    prompt = PromptBuilder() \
+    builder = PromptBuilder() \
         .with_context(context) \
         .with_user_question(question) \
         .with_overrides() \
         .with_golden_examples() \
-        .with_additional_info() \
-        .build()
+        .with_additional_info()
+    prompt = builder.build()
+    logger.info(f"Prompt built in {builder.last_build_us:.0f} us: ~{builder.token_count} tokens {builder.section_tokens}")
 
     return prompt
 
+def prepare(questions):
+    """Embed a whole query set up front so each run() reuses the cached vectors."""
+    from pkg.copilot.DP_logic.DynamicPrompt.dynamic_prompt.retriever import Retriever
+
+    try:
+        Retriever.shared().prepare([q.strip() for q in questions])
+    except Exception as e:
+        # Not fatal: each question will embed itself in run()
+        logger.warning(f"Could not pre-embed query set: {e}")
+
 OLLAMA_CONFIG = load_ollama_config()
 OLLAMA_URL = OLLAMA_CONFIG.get("ollama_url", "http://localhost:11434/api/generate")
+# ollama_url is the server base URL in the shared config; the generate endpoint lives below it
+if not OLLAMA_URL.rstrip("/").endswith("/api/generate"):
+    OLLAMA_URL = OLLAMA_URL.rstrip("/") + "/api/generate"
 OLLAMA_MODEL = OLLAMA_CONFIG.get("ollama_model", "mistral")
+PROMQL_STREAMING = OLLAMA_CONFIG.get("promql_streaming", True)
+FINAL_ANSWER_TOKEN_BUDGET = int(OLLAMA_CONFIG.get("final_answer_token_budget", 2000))
 
 PROMQL_PATTERN = r"```(?:promql)?\s*(.*?)\s*```"
+PROMQL_REGEX = re.compile(PROMQL_PATTERN, re.DOTALL)
+
+
+def _stream_until_promql(prompt: str) -> tuple:
+    """
+    Stream a generation and stop as soon as the first fenced block closes.
+
+    Returns (match or None, text received so far). Leaving the stream early
+    closes the connection, which makes Ollama cancel the rest of the
+    generation.
+    """
+    started = time.perf_counter()
+    chunks = []
+    with httpx.stream("POST", OLLAMA_URL, json={
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True
+    }, timeout=120) as response:
+        if response.status_code != 200:
+            response.read()
+            logger.error(f"Ollama failed: {response.status_code} - {response.text}")
+            raise RuntimeError(f"Ollama error: {response.status_code}")
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if "error" in event:
+                raise RuntimeError(f"Ollama error: {event['error']}")
+            token = event.get("response", "")
+            if token:
+                chunks.append(token)
+                # Only a new closing fence can complete the match, so skip the regex otherwise
+                if "`" in token:
+                    text = "".join(chunks)
+                    match = PROMQL_REGEX.search(text)
+                    if match:
+                        logger.info(f"Time to PromQL: {time.perf_counter() - started:.2f}s "
+                                    f"(stopped after {len(chunks)} tokens)")
+                        return match, text
+            if event.get("done"):
+                break
+
+    text = "".join(chunks)
+    logger.info(f"Full Ollama response time: {time.perf_counter() - started:.2f}s")
+    return PROMQL_REGEX.search(text), text
+
 
 # STEP 1: Ask Ollama to convert NL → PromQL
 def get_promql_from_ollama(question: str) -> tuple:
@@ -46,24 +120,34 @@ def get_promql_from_ollama(question: str) -> tuple:
     
     logger.info(f"Sending Query to Ollama: {enhanced_prompt}")
 
-    try:
-        response = httpx.post(OLLAMA_URL, json={
-            "model": OLLAMA_MODEL,
-            "prompt": enhanced_prompt,
-            "stream": False
-        }, timeout=120)
-    except Exception as e:
-        logger.error(f"Failed to connect to Ollama: {e}")
-        raise
+    if PROMQL_STREAMING:
+        try:
+            match, full_response = _stream_until_promql(enhanced_prompt)
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to connect to Ollama: {e}")
+            raise
+    else:
+        started = time.perf_counter()
+        try:
+            response = httpx.post(OLLAMA_URL, json={
+                "model": OLLAMA_MODEL,
+                "prompt": enhanced_prompt,
+                "stream": False
+            }, timeout=120)
+        except Exception as e:
+            logger.error(f"Failed to connect to Ollama: {e}")
+            raise
 
-    if response.status_code != 200:
-        logger.error(f"Ollama failed: {response.status_code} - {response.text}")
-        raise RuntimeError(f"Ollama error: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"Ollama failed: {response.status_code} - {response.text}")
+            raise RuntimeError(f"Ollama error: {response.status_code}")
+
+        full_response = response.json().get("response", "")
+        logger.info(f"Full Ollama response time: {time.perf_counter() - started:.2f}s")
+        match = PROMQL_REGEX.search(full_response)
 
-    full_response = response.json().get("response", "")
     logger.info(f"Ollama response: {full_response}\n\n")
 
-    match = re.search(PROMQL_PATTERN, full_response, re.DOTALL)
     if not match:
         logger.error("Ollama response did not contain a valid PromQL query")
         raise ValueError("No valid PromQL found")
@@ -73,20 +157,110 @@ def get_promql_from_ollama(question: str) -> tuple:
     return promql, full_response
 
 # STEP 2: Run PromQL on Prometheus
+DEFAULT_QUERY_TIMEOUT = 30.0
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# One client (and so one keep-alive requests session) per distinct instance config
+_prometheus_clients = {}
+_prometheus_clients_lock = Lock()
+_fanout_executor = None
+
+
+def prometheus_instances(prom_config: dict) -> list:
+    """
+    Instance configs from prometheus_config.yaml.
+
+    Supports the ``prometheus_instances`` list as well as a single legacy
+    top-level ``base_url``.
+    """
+    instances = prom_config.get("prometheus_instances")
+    if instances:
+        return instances
+    if prom_config.get("base_url"):
+        return [{"name": "prometheus", "base_url": prom_config["base_url"], "disable_ssl": True}]
+    raise ValueError("No Prometheus instances configured (expected 'prometheus_instances' or 'base_url')")
+
+
+def _instance_timeout(cfg: dict, prom_config: dict) -> float:
+    return float(cfg.get("timeout_seconds", prom_config.get("query_timeout_seconds", DEFAULT_QUERY_TIMEOUT)))
+
+
+def get_prometheus_client(cfg: dict, prom_config: dict) -> PrometheusConnect:
+    """
+    Return the shared PrometheusConnect for an instance config, creating it on first use.
+
+    Clients are keyed by everything that affects the connection, so editing
+    an instance in the config yields a new client rather than a stale one.
+    The session gets a connection pool sized by ``http_pool.pool_maxsize``
+    and retries idempotent requests on connection errors and 429/5xx.
+    """
+    pool = prom_config.get("http_pool", {}) or {}
+    headers = cfg.get("headers") or {}
+    disable_ssl = cfg.get("disable_ssl", False)
+    timeout = _instance_timeout(cfg, prom_config)
+    key = (cfg["base_url"], json.dumps(headers, sort_keys=True), disable_ssl, timeout, json.dumps(pool, sort_keys=True))
+
+    with _prometheus_clients_lock:
+        client = _prometheus_clients.get(key)
+        if client is None:
+            retry = Retry(
+                total=int(pool.get("retries", DEFAULT_RETRIES)),
+                backoff_factor=float(pool.get("backoff_factor", DEFAULT_BACKOFF_FACTOR)),
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(["GET", "POST"]),
+                raise_on_status=False,
+            )
+            pool_maxsize = int(pool.get("pool_maxsize", DEFAULT_POOL_MAXSIZE))
+            session = requests.Session()
+            session.verify = not disable_ssl
+            # PrometheusConnect mounts its own unpooled adapter on base_url; every
+            # API call goes through base_url/api/, and the longer prefix wins
+            session.mount(f"{cfg['base_url'].rstrip('/')}/api/", HTTPAdapter(
+                pool_connections=pool_maxsize,
+                pool_maxsize=pool_maxsize,
+                max_retries=retry,
+            ))
+            client = PrometheusConnect(
+                url=cfg["base_url"],
+                headers=headers,
+                disable_ssl=disable_ssl,
+                retry=retry,
+                session=session,
+                timeout=timeout,
+            )
+            _prometheus_clients[key] = client
+            logger.info(f"Initialized Prometheus client: {cfg.get('name', cfg['base_url'])} -> {cfg['base_url']}")
+        return client
+
+
+def _get_fanout_executor(prom_config: dict) -> ThreadPoolExecutor:
+    global _fanout_executor
+    with _prometheus_clients_lock:
+        if _fanout_executor is None:
+            workers = int(prom_config.get("fanout_workers", 8))
+            _fanout_executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="prom-fanout")
+        return _fanout_executor
+
+
 def query_prometheus(promql: str, prom_config: dict):
-    logger.info(f"Querying Prometheus with: {promql}")
+    """
+    Run promql on every configured Prometheus instance.
 
-    prom = PrometheusConnect(
-        url=prom_config["base_url"],
-        disable_ssl=True
-    )
+    With a single instance the result is the plain query result. With
+    several, the instances are queried concurrently and the result maps each
+    instance name to its data, or to ``{"error": ...}`` if that instance
+    failed or missed its deadline.
+    """
+    logger.info(f"Querying Prometheus with: {promql}")
 
     try:
-        result = prom.custom_query(query=promql)
-        logger.info("Prometheus query successful")
-        return {
-            "promql": promql,
-            "result": result
+        instances = prometheus_instances(prom_config)
+        clients = {
+            cfg.get("name", cfg["base_url"]): (get_prometheus_client(cfg, prom_config), _instance_timeout(cfg, prom_config))
+            for cfg in instances
         }
     except Exception as e:
         logger.error(f"Prometheus query failed: {e}")
@@ -95,6 +269,54 @@ def query_prometheus(promql: str, prom_config: dict):
             "error": str(e)
         }
 
+    if len(clients) == 1:
+        (client, _), = clients.values()
+        try:
+            result = client.custom_query(query=promql)
+            logger.info("Prometheus query successful")
+            return {
+                "promql": promql,
+                "result": result
+            }
+        except Exception as e:
+            logger.error(f"Prometheus query failed: {e}")
+            return {
+                "promql": promql,
+                "error": str(e)
+            }
+
+    executor = _get_fanout_executor(prom_config)
+    started = time.monotonic()
+    futures = {
+        name: (executor.submit(client.custom_query, query=promql), timeout)
+        for name, (client, timeout) in clients.items()
+    }
+
+    results = {}
+    for name, (future, timeout) in futures.items():
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        try:
+            results[name] = future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            future.cancel()
+            results[name] = {"error": f"Timed out after {timeout}s"}
+        except Exception as e:
+            results[name] = {"error": str(e)}
+        if isinstance(results[name], dict) and "error" in results[name]:
+            logger.error(f"Prometheus query failed on {name}: {results[name]['error']}")
+
+    failed = [name for name, value in results.items() if isinstance(value, dict) and "error" in value]
+    if len(failed) == len(results):
+        return {
+            "promql": promql,
+            "error": "; ".join(f"{name}: {results[name]['error']}" for name in failed)
+        }
+    logger.info(f"Prometheus query successful on {len(results) - len(failed)}/{len(results)} instances")
+    return {
+        "promql": promql,
+        "result": results
+    }
+
 # STEP 3: Send PromQL results back to Ollama for final answer
 def get_final_answer_from_ollama(user_question: str, promql: str, prom_result: dict) -> str:
     system_prompt = """You are an expert copilot for Prometheus metric data. Your task is to analyze Prometheus query results and provide a clear, concise answer to the user's question.
@@ -113,7 +335,12 @@ If there's an error or no data, explain what that means in context of their ques
     if "error" in prom_result:
         data_section = f"Error occurred while querying Prometheus: {prom_result['error']}"
     else:
-        data_section = f"Prometheus returned the following data: {prom_result['result']}"
+        compacted = compact_result(prom_result['result'], FINAL_ANSWER_TOKEN_BUDGET)
+        stats = compaction_stats(prom_result['result'], compacted)
+        prom_result["compaction"] = stats
+        logger.info(f"Result compacted from ~{stats['raw_tokens']} to ~{stats['compact_tokens']} tokens "
+                    f"(ratio {stats['ratio']}x)")
+        data_section = f"Prometheus returned the following data: {compacted}"
     
     final_prompt = f"""{system_prompt}
 
@@ -145,11 +372,57 @@ Please provide a clear answer to the user's question based on this information:"
     logger.info("Final answer generated successfully")
     return final_answer
 
+_promql_cache = None
+_promql_cache_lock = Lock()
+
+
+def get_promql_cache():
+    """The process-wide PromQL cache, or None when PROMQL_CACHE_ENABLED is off."""
+    global _promql_cache
+    if not promql_cache.promql_cache_enabled:
+        return None
+    with _promql_cache_lock:
+        if _promql_cache is None:
+            _promql_cache = promql_cache.PromQLCache()
+        return _promql_cache
+
+
+def _cache_fingerprint(cache):
+    return promql_cache.prompt_fingerprint(OLLAMA_MODEL, cache.embedder.model_name)
+
+
 # MAIN ENTRY POINT
 def run(question: str, prom_config: dict):
     try:
-        promql, ollama_response = get_promql_from_ollama(question)
+        cached = None
+        try:
+            cache = get_promql_cache()
+            if cache is not None:
+                fingerprint = _cache_fingerprint(cache)
+                cached = cache.lookup(question.strip(), fingerprint)
+        except Exception as e:
+            # The cache only saves time; never fail a question because of it
+            logger.warning(f"PromQL cache lookup failed: {e}")
+            cache = None
+
+        if cached:
+            promql, ollama_response, similarity = cached
+            logger.info(f"PromQL cache hit (similarity {similarity:.3f}), skipping generation: {promql}")
+        else:
+            promql, ollama_response = get_promql_from_ollama(question)
         result = query_prometheus(promql, prom_config)
+
+        if cache is not None:
+            # Only cache queries Prometheus accepted
+            if not cached and "error" not in result:
+                try:
+                    cache.store(question.strip(), fingerprint, promql, ollama_response)
+                except Exception as e:
+                    logger.warning(f"Could not store PromQL in cache: {e}")
+            stats = cache.stats()
+            logger.info(f"PromQL cache: hit rate {stats['hit_rate']:.0%} "
+                        f"({stats['hits']} hits, {stats['misses']} misses, {stats['size']} entries)")
+
         final_answer = get_final_answer_from_ollama(question, promql, result)
         
         result["ollama_response"] = ollama_response
@@ -0,0 +1,297 @@
+"""
+Persistent semantic cache of NL question -> generated PromQL.
+
+Questions are embedded with the DynamicPrompt Embedder. A new question reuses
+a cached PromQL when its cosine similarity to a cached question reaches the
+threshold and both questions carry the same literal tokens (numbers,
+identifiers like ``kube-system``, time units, quoted strings), and every
+string literal of the cached PromQL that came from the cached question also
+appears in the new question as a whole word. This stops "namespace a" from
+answering "namespace b" (the "a" inside "namespace" does not count),
+"namespace prod" from answering "namespace production" and "last hour" from
+answering "last day", while label values the model added on its own
+(``job="kube-state-metrics"``) do not block a hit.
+
+Entries are stored in SQLite with the fingerprint of everything that shapes
+the generated PromQL (template sections, overrides, golden examples,
+additional info, the onboarded metric catalog, EXAMPLES_TOP_K,
+PROMPT_TOKEN_BUDGET, LLM and embedding model). Entries with a different
+fingerprint are dropped. Eviction is by TTL and least-recent use.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+import os
+import dotenv
+dotenv.load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+promql_cache_enabled = os.getenv("PROMQL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+promql_cache_path = os.getenv("PROMQL_CACHE_PATH", "config/promql_cache.sqlite")
+promql_cache_threshold = float(os.getenv("PROMQL_CACHE_THRESHOLD", "0.95"))
+promql_cache_max_entries = int(os.getenv("PROMQL_CACHE_MAX_ENTRIES", "5000"))
+promql_cache_ttl_seconds = float(os.getenv("PROMQL_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+TIME_UNITS = {"second", "sec", "minute", "min", "hour", "hr", "day", "week", "month", "year", "today", "yesterday"}
+REGEX_CHARS = set(".*+?|()[]{}^$\\")
+QUOTED = re.compile(r'"([^"]*)"|\'([^\']*)\'')
+TOKEN = re.compile(r"[a-z0-9][a-z0-9_\-./:]*")
+WORD = re.compile(r"[a-z0-9_.:\-]+")
+PROMQL_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+AT_MODIFIER = re.compile(r"@\s*(\d+(?:\.\d+)?)")
+RFC3339 = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS promql_cache (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint TEXT NOT NULL,
+    question TEXT NOT NULL,
+    literals TEXT NOT NULL,
+    question_values TEXT NOT NULL DEFAULT '[]',
+    vector BLOB NOT NULL,
+    promql TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (fingerprint, question)
+);
+CREATE INDEX IF NOT EXISTS promql_cache_last_used ON promql_cache (last_used_at);
+"""
+
+
+def literal_tokens(question: str) -> frozenset:
+    """Tokens that change the meaning of a question without moving its embedding much."""
+    text = question.lower()
+    literals = {a or b for a, b in QUOTED.findall(text)}
+    for token in TOKEN.findall(text):
+        token = token.rstrip("-./:")
+        unit = token[:-1] if token.endswith("s") and token[:-1] in TIME_UNITS else token
+        if unit in TIME_UNITS:
+            literals.add(unit)
+        elif any(c.isdigit() or c in "_-./:" for c in token):
+            literals.add(token)
+    return frozenset(literals)
+
+
+def promql_literals(promql: str) -> list:
+    """Plain (non-regex) string literals of a PromQL expression, e.g. label values."""
+    return [value for value in PROMQL_STRING.findall(promql) if value and not REGEX_CHARS & set(value)]
+
+
+def question_words(question: str) -> frozenset:
+    """Whole words and quoted strings of a question, lowercased, for matching label values."""
+    text = question.lower()
+    words = {a or b for a, b in QUOTED.findall(text)}
+    for word in WORD.findall(text):
+        words.add(word)
+        words.add(word.strip("-.:"))
+    return frozenset(words)
+
+
+def question_values(question: str, promql: str) -> list:
+    """PromQL string literals that were taken from the question (and so must match on reuse)."""
+    words = question_words(question)
+    return sorted({value for value in promql_literals(promql) if value.lower() in words})
+
+
+def shift_times(text: str, seconds: float) -> str:
+    """Move absolute times (``@ <unix>`` modifiers and RFC 3339 timestamps) forward by seconds."""
+    if not seconds:
+        return text
+
+    def shift_at(match):
+        return f"@ {float(match.group(1)) + seconds:.3f}".rstrip("0").rstrip(".")
+
+    def shift_rfc3339(match):
+        value = match.group(0)
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00")) + timedelta(seconds=seconds)
+        if value.endswith("Z"):
+            return parsed.astimezone(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+        return parsed.isoformat(timespec="seconds")
+
+    return RFC3339.sub(shift_rfc3339, AT_MODIFIER.sub(shift_at, text))
+
+
+def prompt_fingerprint(model: str, embedding_model: str) -> str:
+    """Hash of every input that shapes the generated PromQL besides the question."""
+    from pkg.copilot.DP_logic.DynamicPrompt.dynamic_prompt import prompt_builder, retriever
+
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{embedding_model}\0".encode())
+    digest.update(f"{prompt_builder.examples_top_k}\0{prompt_builder.prompt_token_budget}\0".encode())
+    # The metric catalog the prompt's context is retrieved from
+    if retriever.embedding_path:
+        digest.update(f"{retriever.Retriever.shared(retriever.embedding_path).corpus_hash}\0".encode())
+    if prompt_builder.template_dir:
+        for name, text in sorted(prompt_builder.cached_sections(prompt_builder.template_dir).items()):
+            digest.update(f"{name}\0{text}\0".encode())
+    for path in (prompt_builder.override_path, prompt_builder.examples_path, prompt_builder.info_path):
+        text = prompt_builder.cached_file(path, str) if path else None
+        digest.update(f"{path}\0{text}\0".encode())
+    return digest.hexdigest()
+
+
+class PromQLCache:
+    """
+    SQLite-backed semantic cache for generated PromQL.
+
+    The vectors for the current fingerprint are kept in memory as one
+    normalized matrix, so a lookup is a single matrix-vector product. Safe
+    to share between the threads of a concurrent query-set run.
+    """
+
+    def __init__(self, path=promql_cache_path, threshold=promql_cache_threshold,
+                 max_entries=promql_cache_max_entries, ttl_seconds=promql_cache_ttl_seconds, embedder=None):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._embedder = embedder
+        self._lock = Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(promql_cache)")}
+        if "question_values" not in columns:
+            # Caches written before question_values existed: drop them rather than guess
+            self._db.execute("DELETE FROM promql_cache")
+            self._db.execute("ALTER TABLE promql_cache ADD COLUMN question_values TEXT NOT NULL DEFAULT '[]'")
+            self._db.commit()
+
+        self.fingerprint = None
+        self._ids = []
+        self._matrix = None
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.invalidations = 0
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from pkg.copilot.DP_logic.DynamicPrompt.dynamic_prompt.embedder import Embedder
+            self._embedder = Embedder()
+        return self._embedder
+
+    def _embed(self, question):
+        vector = np.asarray(self.embedder.embed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _use_fingerprint(self, fingerprint):
+        """Switch to fingerprint, dropping entries built from other prompts or models."""
+        if fingerprint == self.fingerprint:
+            return
+        deleted = self._db.execute("DELETE FROM promql_cache WHERE fingerprint != ?", (fingerprint,)).rowcount
+        self._db.commit()
+        if deleted:
+            self.invalidations += deleted
+            logger.info(f"PromQL cache: dropped {deleted} entries built with a different prompt or model")
+        self.fingerprint = fingerprint
+        self._reload()
+
+    def _reload(self):
+        rows = self._db.execute(
+            "SELECT id, vector FROM promql_cache WHERE fingerprint = ? ORDER BY id", (self.fingerprint,)
+        ).fetchall()
+        self._ids = [row[0] for row in rows]
+        self._matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+
+    def _evict(self, now):
+        expired = self._db.execute(
+            "DELETE FROM promql_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self._db.execute(
+            "DELETE FROM promql_cache WHERE id IN ("
+            "SELECT id FROM promql_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+        ).rowcount
+        self._db.commit()
+        return expired + overflow
+
+    def lookup(self, question, fingerprint):
+        """
+        Return (promql, response, similarity) for a cached equivalent question, or None.
+
+        Absolute times in the cached PromQL and response are shifted by the
+        entry's age so they refer to now rather than to when it was generated.
+        """
+        vector = self._embed(question)
+        with self._lock:
+            self._use_fingerprint(fingerprint)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            scores = self._matrix @ vector
+            literals = literal_tokens(question)
+            words = question_words(question)
+            for row in np.argsort(-scores):
+                if scores[row] < self.threshold:
+                    break
+                entry = self._db.execute(
+                    "SELECT literals, question_values, promql, response, created_at FROM promql_cache WHERE id = ?",
+                    (self._ids[row],)
+                ).fetchone()
+                if entry is None or entry[4] < now - self.ttl_seconds:
+                    continue
+                cached_literals, cached_values, promql, response, created_at = entry
+                if frozenset(json.loads(cached_literals)) != literals or \
+                        any(value.lower() not in words for value in json.loads(cached_values)):
+                    self.rejected += 1
+                    continue
+
+                self._db.execute(
+                    "UPDATE promql_cache SET last_used_at = ?, hit_count = hit_count + 1 WHERE id = ?",
+                    (now, self._ids[row])
+                )
+                self._db.commit()
+                self.hits += 1
+                age = now - created_at
+                return shift_times(promql, age), shift_times(response, age), float(scores[row])
+
+            self.misses += 1
+            return None
+
+    def store(self, question, fingerprint, promql, response):
+        vector = self._embed(question)
+        with self._lock:
+            self._use_fingerprint(fingerprint)
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO promql_cache "
+                "(fingerprint, question, literals, question_values, vector, promql, response, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (fingerprint, question, json.dumps(sorted(literal_tokens(question))),
+                 json.dumps(question_values(question, promql)), vector.tobytes(),
+                 promql, response, now, now)
+            )
+            self._db.commit()
+            self._evict(now)
+            self._reload()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected_by_literals": self.rejected,
+                "invalidated": self.invalidations,
+                "size": len(self._ids),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,173 @@
+"""
+Compact Prometheus query results for the final-answer prompt.
+
+Raw results are passed through unchanged when they fit the token budget.
+Larger vectors and matrices are replaced by aggregate statistics plus the
+top series by value, with as many series lines as the budget allows.
+Tokens are estimated as characters / 4.
+"""
+
+import warnings
+
+import numpy as np
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _fmt(value) -> str:
+    return f"{value:.4g}"
+
+
+def _is_series_list(result) -> bool:
+    return isinstance(result, list) and bool(result) and all(
+        isinstance(series, dict) and "metric" in series for series in result
+    )
+
+
+def _labels(metric: dict, skip) -> str:
+    pairs = ", ".join(f'{key}="{value}"' for key, value in metric.items() if key not in skip)
+    return "{" + pairs + "}"
+
+
+def _common_labels(metrics) -> dict:
+    """Labels with the same value on every series; printed once instead of per line."""
+    if len(metrics) < 2:
+        return {}
+    common = dict(metrics[0])
+    for metric in metrics[1:]:
+        common = {key: value for key, value in common.items() if metric.get(key) == value}
+        if not common:
+            break
+    return common
+
+
+def _matrix_stats(result):
+    """
+    Per-series statistics for a range result, computed on a NaN-padded
+    (series, samples) array.
+    """
+    lengths = np.array([len(series.get("values", [])) for series in result])
+    width = max(int(lengths.max()), 1)
+    samples = np.array(
+        [sample for series in result for sample in series.get("values", [])], dtype=np.float64
+    ).reshape(-1, 2)
+    rows = np.repeat(np.arange(len(result)), lengths)
+    cols = np.arange(len(samples)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    times = np.full((len(result), width), np.nan)
+    values = np.full((len(result), width), np.nan)
+    times[rows, cols] = samples[:, 0]
+    values[rows, cols] = samples[:, 1]
+
+    # All-NaN series are expected (e.g. division by zero); their stats stay NaN
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=1)
+        last_index = np.where(valid, np.arange(width), -1).max(axis=1)
+        last = np.where(last_index >= 0, values[np.arange(len(result)), np.maximum(last_index, 0)], np.nan)
+
+        # Least-squares slope per series (units per second), ignoring NaN samples
+        t = np.where(valid, times, np.nan)
+        t_centered = t - np.nanmean(t, axis=1, keepdims=True)
+        v_centered = values - np.nanmean(values, axis=1, keepdims=True)
+        denominator = np.nansum(t_centered ** 2, axis=1)
+        slope = np.where(denominator > 0, np.nansum(t_centered * v_centered, axis=1) / denominator, 0.0)
+
+        return {
+            "last": last,
+            "min": np.nanmin(values, axis=1),
+            "max": np.nanmax(values, axis=1),
+            "mean": np.nanmean(values, axis=1),
+            "p95": np.nanpercentile(values, 95, axis=1),
+            "slope": slope,
+            "samples": counts,
+        }, values
+
+
+def _summary(values: np.ndarray) -> str:
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return "all values are NaN"
+    return (f"min={_fmt(values.min())} max={_fmt(values.max())} mean={_fmt(values.mean())} "
+            f"p95={_fmt(np.percentile(values, 95))}")
+
+
+def _compact_series(result, char_budget: int) -> str:
+    metrics = [series.get("metric", {}) for series in result]
+    common = _common_labels(metrics)
+    is_matrix = any("values" in series for series in result)
+
+    if is_matrix:
+        stats, values = _matrix_stats(result)
+        rank = stats["last"]
+        header = [f"Range result: {len(result)} series, overall {_summary(values.ravel())}."]
+        lines = [
+            f"{_labels(metric, common)} last={_fmt(stats['last'][i])} min={_fmt(stats['min'][i])} "
+            f"max={_fmt(stats['max'][i])} mean={_fmt(stats['mean'][i])} p95={_fmt(stats['p95'][i])} "
+            f"slope={_fmt(stats['slope'][i])}/s samples={int(stats['samples'][i])}"
+            for i, metric in enumerate(metrics)
+        ]
+    else:
+        rank = np.array([float(series.get("value", [0, "nan"])[1]) for series in result])
+        header = [f"Instant result: {len(result)} series, {_summary(rank)}."]
+        lines = [f"{_labels(metric, common)} {_fmt(rank[i])}" for i, metric in enumerate(metrics)]
+
+    if common:
+        header.append(f"Labels shared by every series: {_labels(common, ())}")
+
+    # Highest values first; NaN series last
+    order = np.argsort(np.where(np.isnan(rank), np.inf, -rank), kind="stable")
+    fixed = len("\n".join(header)) + 64
+    line_lengths = np.array([len(lines[i]) + 1 for i in order])
+    k = int(np.searchsorted(np.cumsum(line_lengths), max(char_budget - fixed, 0), side="right"))
+    k = max(k, 1)
+
+    if k < len(result):
+        by = "last value" if is_matrix else "value"
+        header.append(f"Top {k} of {len(result)} series by {by}:")
+    return "\n".join(header + [lines[i] for i in order[:k]])
+
+
+def compact_result(result, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    Text for the final-answer prompt describing result within token_budget.
+
+    Handles instant vectors, range matrices and the {instance name: result}
+    mapping dp_logic returns for several Prometheus instances. Anything else
+    (scalars, strings) is passed through as is.
+    """
+    raw = str(result)
+    if estimate_tokens(raw) <= token_budget:
+        return raw
+
+    char_budget = token_budget * CHARS_PER_TOKEN
+    if _is_series_list(result):
+        return _compact_series(result, char_budget)
+
+    if isinstance(result, dict) and result:
+        share = char_budget // len(result)
+        sections = []
+        for name, instance_result in result.items():
+            if _is_series_list(instance_result):
+                body = _compact_series(instance_result, share)
+            else:
+                body = str(instance_result)[:share]
+            sections.append(f"[{name}]\n{body}")
+        return "\n\n".join(sections)
+
+    return raw[:char_budget]
+
+
+def compaction_stats(result, compacted: str) -> dict:
+    raw_tokens = estimate_tokens(str(result))
+    compact_tokens = estimate_tokens(compacted)
+    return {
+        "raw_tokens": raw_tokens,
+        "compact_tokens": compact_tokens,
+        "ratio": round(raw_tokens / compact_tokens, 2) if compact_tokens else 1.0,
+    }
@@ -1,65 +1,31 @@
 # host.py
 import asyncio
 import json
-import httpx
 from fastmcp import Client
 import re
 
+from llm_transport import LLMTransport
+
 client = Client("http://localhost:8001/mcp")
 
 
 OLLAMA_API_URL = "http://localhost:11434"
 MODEL_NAME = "qwen2.5-coder:14b"  # replace with your model
 
-
-import httpx
+# Shared, keep-alive connection pool for every LLM call
+llm_transport = LLMTransport(OLLAMA_API_URL, MODEL_NAME)
 
 async def ask_ollama_stream(prompt: str):
     """
     Async generator that yields only the text content from Ollama streaming.
     """
-    async with httpx.AsyncClient(timeout=None) as session:
-        async with session.stream(
-            "POST",
-            f"{OLLAMA_API_URL}/v1/completions",
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "max_tokens": 1000,
-                "temperature": 0.0,
-                "stream": True
-            },
-        ) as response:
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    chunk = line[6:]
-                    if chunk != "[DONE]":
-                        try:
-                            data = json.loads(chunk)
-                            text = data.get("choices", [{}])[0].get("text", "")
-                            if text:
-                                yield text
-                        except json.JSONDecodeError:
-                            continue
+    async for text in llm_transport.stream(prompt):
+        yield text
 
 
 async def ask_ollama(prompt: str) -> str:
     """Send prompt to Ollama LLM and return completion"""
-    async with httpx.AsyncClient(timeout=300.0) as session:  # <- increased timeout
-        resp = await session.post(
-            f"{OLLAMA_API_URL}/v1/completions",
-            json={
-                "model": "qwen2.5-coder:14b",
-                "prompt": prompt,
-                "max_tokens": 1000,
-                "temperature": 0.0
-            }
-        )
-        resp.raise_for_status()
-        
-        data = resp.json()
-        
-        return data["choices"][0]["text"]
+    return await llm_transport.complete(prompt)
     
 
 
@@ -100,22 +66,28 @@ async def run_query(nl_query: str):
         print(chunk, end="", flush=True)  # live summary
         full_summary += chunk
     print("\n")
+    print("LLM connection stats:", llm_transport.stats())
     return full_summary, result
 
 
-if __name__ == "__main__":
-
+async def repl():
+    # One event loop for the whole session so the pooled LLM connections survive between queries
     context = ""
+    try:
+        while True:
+            print("Current Context:", context)
 
-    while True:
-        print("Current Context:", context)
+            query = str(await asyncio.to_thread(input, "\n\nEnter your query: "))
+            print("\n")
 
-        query = str(input("\n\nEnter your query: "))
-        print("\n")
+            if(query == "exit"):
+                break
 
-        if(query == "exit"):
-            break
 
-    
-        summary, result = asyncio.run(run_query(context + query))
-        
+            summary, result = await run_query(context + query)
+    finally:
+        await llm_transport.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(repl())
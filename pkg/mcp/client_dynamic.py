@@ -1,12 +1,19 @@
 import asyncio
 import json
-import httpx
 import re
 import os
 import yaml
 import string
 from fastmcp import Client
 
+from llm_transport import LLMTransport
+from param_resolver import (
+    LLM_CALLS_PER_RESOLUTION,
+    is_unresolved,
+    resolve_params,
+    resolver_stats,
+)
+
 def load_config(path="config.yaml"):
     if not os.path.exists(path):
         raise FileNotFoundError(f"Config file not found: {path}")
@@ -20,48 +27,16 @@ server_config  = load_config("../../config/mcp_server_config.yaml")
 OLLAMA_API_URL = ollama_config.get("ollama_url")
 MODEL_NAME = ollama_config.get("ollama_model")
 client = Client(server_config.get("mcp_server_url", "http://localhost:8001/mcp"))
+llm_transport = LLMTransport.from_config(ollama_config)
 
 async def ask_ollama_stream(prompt: str):
     
-    async with httpx.AsyncClient(timeout=None) as session:
-        async with session.stream(
-            "POST",
-            f"{OLLAMA_API_URL}/v1/completions",
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "max_tokens": 1000,
-                "temperature": 0.0,
-                "stream": True
-            },
-        ) as response:
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    chunk = line[6:]
-                    if chunk != "[DONE]":
-                        try:
-                            data = json.loads(chunk)
-                            text = data.get("choices", [{}])[0].get("text", "")
-                            if text:
-                                yield text
-                        except json.JSONDecodeError:
-                            continue
+    async for text in llm_transport.stream(prompt):
+        yield text
 
 async def ask_ollama(prompt: str, history="") -> str:
     
-    async with httpx.AsyncClient(timeout=300.0) as session:
-        resp = await session.post(
-            f"{OLLAMA_API_URL}/v1/completions",
-            json={
-                "model": MODEL_NAME,
-                "prompt": prompt + str(history),
-                "max_tokens": 1000,
-                "temperature": 0.0
-            }
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["text"]
+    return await llm_transport.complete(prompt + str(history))
 
 
 async def llm_to_workflow(nl_query: str) -> list:
@@ -102,64 +77,124 @@ async def llm_to_workflow(nl_query: str) -> list:
         return [{"tool_name": nl_query.strip(), "params": {}}]
 
 
-async def execute_workflow(workflow: list) -> list:
+TEMPLATE_PATTERN = re.compile(r"\$(?:\{(\w+)\}|(\w+))")
+
+
+def template_references(step: dict) -> set:
+    """Names referenced as ${name} / $name in a step's string params."""
+    names = set()
+    for v in (step.get("params") or {}).values():
+        if isinstance(v, str):
+            for braced, bare in TEMPLATE_PATTERN.findall(v):
+                names.add(braced or bare)
+    return names
+
+
+def build_dependency_graph(workflow: list) -> list:
+    """
+    Return, for each step, the indices of the steps it has to wait for.
+
+    A ``${tool}`` reference depends on the closest earlier step that calls
+    that tool, so the step starts as soon as the results it names exist.
+    A step with empty params is resolved from all earlier results and waits
+    for every step before it. Independent steps run immediately.
+    """
+    dependencies = []
+    for index, step in enumerate(workflow):
+        if any(is_unresolved(v) for v in (step.get("params") or {}).values()):
+            dependencies.append(list(range(index)))
+            continue
+        needed = set()
+        for name in template_references(step):
+            producers = [i for i in range(index) if workflow[i].get("tool_name") == name]
+            if producers:
+                needed.add(producers[-1])
+        dependencies.append(sorted(needed))
+    return dependencies
+
+
+async def execute_step(step: dict, prior_results: list, context: dict) -> dict:
+
+    print("Executing step:", step)
+
+    tool_name = step.get("tool_name")
+    params = step.get("params", {}).copy()
+
     
-    context = {}  
-    results = []
-    history = ""
+    print(params.items())
+    for k, v in params.items():
+        if isinstance(v, str) and "{" in v:
+            try:
+                params[k] = string.Template(v).safe_substitute(context)
+            except Exception:
+                pass
 
-    async with client:
-        for step in workflow:
-
-            print("Executing step:", step)
-
-            tool_name = step.get("tool_name")
-            params = step.get("params", {}).copy()
-
-            
-            print(params.items())
-            for k, v in params.items():
-                if isinstance(v, str) and "{" in v:
-                    try:
-                        params[k] = string.Template(v).safe_substitute(context)
-                    except Exception:
-                        pass
-
-            
-            for k, v in params.items():
-                if v is None or (isinstance(v, str) and v.strip() == "") or v=="" or v==[]:
-                    print("Resolving param my making another call to LLM...")
-                    summary_prompt = f"Summarize these tool call results: {results}\nProvide a neat minimal summary."
-
-                    llm_value = await ask_ollama(summary_prompt, "")
-                    prompt = (
-                        f"\nGiven the previous tool outputs, \n"
-                        f"Read carefully and get the appropriate value from previous tool outputs for the workflow step for parameter {v}. Make sure the value is of correct type (str, int, list etc)"
-                        "and return tool call only in JSON format. remove unnecessary characters and '\n', also make sure number of params is same as the workflow step \n"
-                    )
-                    llm_value = await ask_ollama(prompt, "Workflow Step: "+str(step) + " Previous tool results: "+str(llm_value))
-                    try:
-                        # Try parsing JSON first
-                        parsed_value = re.sub(r"```(?:json)?", "", llm_value.strip())
-                        params = json.loads(parsed_value)
-                        params = params["params"]
-                    except json.JSONDecodeError:
-                        # fallback: use raw text
-                        params = re.sub(r"```(?:json)?", "", llm_value.strip())
-                        params = params["params"]
-
-           
+    
+    if any(is_unresolved(v) for v in params.values()):
+        # Fill empty params straight from earlier tool results first
+        params = resolve_params(params, prior_results)
+
+        if any(is_unresolved(v) for v in params.values()):
+            print("Resolving param my making another call to LLM...")
+            resolver_stats["llm_fallbacks"] += 1
+            summary_prompt = f"Summarize these tool call results: {prior_results}\nProvide a neat minimal summary."
+
+            llm_value = await ask_ollama(summary_prompt, "")
+            prompt = (
+                f"\nGiven the previous tool outputs, \n"
+                f"Read carefully and get the appropriate value from previous tool outputs for the workflow step for parameter {params}. Make sure the value is of correct type (str, int, list etc)"
+                "and return tool call only in JSON format. remove unnecessary characters and '\n', also make sure number of params is same as the workflow step \n"
+            )
+            llm_value = await ask_ollama(prompt, "Workflow Step: "+str(step) + " Previous tool results: "+str(llm_value))
             try:
-                print("Calling tool:", tool_name, "with params:", params)
-                result = await client.call_tool(tool_name, params)
-            except Exception as e:
-                result = {"error": str(e)}
+                # Try parsing JSON first
+                parsed_value = re.sub(r"```(?:json)?", "", llm_value.strip())
+                params = json.loads(parsed_value)
+                params = params["params"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # fallback: keep whatever could be resolved deterministically
+                print("Could not parse LLM param resolution, using resolved params:", params)
+        else:
+            print("Resolved params from previous tool results:", params)
+            resolver_stats["resolved_steps"] += 1
+            resolver_stats["llm_calls_avoided"] += LLM_CALLS_PER_RESOLUTION
+
+   
+    try:
+        print("Calling tool:", tool_name, "with params:", params)
+        result = await client.call_tool(tool_name, params)
+    except Exception as e:
+        result = {"error": str(e)}
+
+    return {"tool_name": tool_name, "result": result}
+
+
+async def execute_workflow(workflow: list) -> list:
+    """
+    Run the planned steps as a dependency graph over one MCP session.
+
+    Steps without dependencies are started concurrently; a dependent step
+    starts as soon as the steps it needs have finished. Results are returned
+    in the original workflow order.
+    """
+    
+    context = {}  
+    dependencies = build_dependency_graph(workflow)
+    print("Workflow dependencies:", dependencies)
+    tasks = []
 
-            
+    async def run_step(index: int) -> dict:
+        prior = [await tasks[d] for d in dependencies[index]]
+        result = await execute_step(workflow[index], prior, context)
+        context[result["tool_name"]] = result["result"]
+        return result
 
-            results.append({"tool_name": tool_name, "result": result})
+    async with client:
+        for index in range(len(workflow)):
+            tasks.append(asyncio.create_task(run_step(index)))
+        results = await asyncio.gather(*tasks)
 
-    return results
+    return list(results)
 
 
 async def run_query(nl_query: str):
@@ -178,19 +213,29 @@ async def run_query(nl_query: str):
         print(chunk, end="", flush=True)
         full_summary += chunk
     print("\n")
+    print("LLM connection stats:", llm_transport.stats())
+    print("Param resolver stats:", resolver_stats)
     return full_summary, results
 
 
-if __name__ == "__main__":
+async def repl():
+    # One event loop for the whole session so the pooled LLM connections survive between queries
     context = ""
-    while True:
-        print("\nCurrent Context:", context)
-        query = str(input("\nEnter your query (or 'exit' to quit)(or 'clear' to clear your history): "))
-        if query.lower() == "exit":
-            break
-        if query.lower() == "clear":
-            context = ""
-            continue
+    try:
+        while True:
+            print("\nCurrent Context:", context)
+            query = str(await asyncio.to_thread(input, "\nEnter your query (or 'exit' to quit)(or 'clear' to clear your history): "))
+            if query.lower() == "exit":
+                break
+            if query.lower() == "clear":
+                context = ""
+                continue
+
+            summary, result = await run_query(context + query)
+            context+=summary
+    finally:
+        await llm_transport.aclose()
 
-        summary, result = asyncio.run(run_query(context + query))
-        context+=summary
+
+if __name__ == "__main__":
+    asyncio.run(repl())
@@ -0,0 +1,144 @@
+import asyncio
+import importlib.util
+import json
+from typing import Any, Dict, Optional
+
+import httpx
+
+
+class LLMTransport:
+    """
+    Long-lived, pooled HTTP transport for Ollama completions.
+
+    A single httpx.AsyncClient is shared across every ask_ollama /
+    ask_ollama_stream call so connections are kept alive and reused instead
+    of being re-established per LLM call. The client is bound to the event
+    loop it was created on, so callers should keep one loop for their whole
+    session (the REPLs run under a single ``asyncio.run``) and ``aclose()``
+    the transport when done; if a different loop does show up, a fresh
+    client is created for it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 120.0,
+        http2: bool = False,
+        timeout: Optional[float] = 300.0,
+    ):
+        self.base_url = base_url
+        self.model = model
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("HTTP/2 requested for Ollama but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.timeout = timeout
+
+        self._session: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.requests = 0
+        self.new_connections = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "LLMTransport":
+        pool = config.get("http_pool", {}) or {}
+        return cls(
+            base_url=config.get("ollama_url"),
+            model=config.get("ollama_model"),
+            max_connections=pool.get("max_connections", 10),
+            max_keepalive_connections=pool.get("max_keepalive_connections", 10),
+            keepalive_expiry=pool.get("keepalive_expiry", 120.0),
+            http2=pool.get("http2", False),
+            timeout=pool.get("timeout", 300.0),
+        )
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.is_closed or self._loop is not loop:
+            # A client from another event loop cannot be reused. Close it on
+            # its own loop if that loop is still alive, so its sockets are not leaked.
+            if self._session is not None and not self._session.is_closed \
+                    and self._loop is not None and not self._loop.is_closed():
+                asyncio.run_coroutine_threadsafe(self._session.aclose(), self._loop)
+            self._session = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+            )
+            self._loop = loop
+        return self._session
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        # httpcore emits this event only when it has to open a new TCP connection.
+        if event_name == "connection.connect_tcp.started":
+            self.new_connections += 1
+
+    def _payload(self, prompt: str, stream: bool) -> Dict[str, Any]:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": 1000,
+            "temperature": 0.0,
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def complete(self, prompt: str) -> str:
+        """Send prompt to Ollama and return the completion text."""
+        self.requests += 1
+        resp = await self._client().post(
+            f"{self.base_url}/v1/completions",
+            json=self._payload(prompt, stream=False),
+            extensions={"trace": self._trace},
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return data["choices"][0]["text"]
+
+    async def stream(self, prompt: str):
+        """Async generator that yields only the text content from Ollama streaming."""
+        self.requests += 1
+        async with self._client().stream(
+            "POST",
+            f"{self.base_url}/v1/completions",
+            json=self._payload(prompt, stream=True),
+            timeout=None,
+            extensions={"trace": self._trace},
+        ) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    chunk = line[6:]
+                    if chunk != "[DONE]":
+                        try:
+                            data = json.loads(chunk)
+                            text = data.get("choices", [{}])[0].get("text", "")
+                            if text:
+                                yield text
+                        except json.JSONDecodeError:
+                            continue
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            "http2": self.http2,
+        }
+
+    async def aclose(self):
+        if self._session is not None and not self._session.is_closed:
+            await self._session.aclose()
+        self._session = None
+        self._loop = None
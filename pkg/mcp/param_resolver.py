@@ -0,0 +1,94 @@
+from typing import Any, Dict, List, Optional
+
+# Param name stems that map onto a differently named key in tool results.
+KEY_ALIASES = {
+    "pod": ["pod", "involved_object_name"],
+    "node": ["node", "instance"],
+    "metric": ["metric", "metric_name"],
+}
+
+# Each deterministic resolution replaces a summarize call plus an extract call.
+LLM_CALLS_PER_RESOLUTION = 2
+
+resolver_stats = {"resolved_steps": 0, "llm_fallbacks": 0, "llm_calls_avoided": 0}
+
+
+def is_unresolved(value) -> bool:
+    return value is None or (isinstance(value, str) and value.strip() == "") or value == []
+
+
+def result_payload(result: Any) -> Any:
+    """Extract the plain data from an MCP CallToolResult (or an error dict)."""
+    for attr in ("data", "structured_content"):
+        value = getattr(result, attr, None)
+        if value is not None:
+            return value
+    return result
+
+
+def is_plural(param_name: str) -> bool:
+    return param_name.endswith(("_names", "_list")) or (
+        param_name.endswith("s") and not param_name.endswith(("ss", "us"))
+    )
+
+
+def param_stem(param_name: str) -> str:
+    """pod_names -> pod, node_name -> node, namespaces -> namespace."""
+    for suffix in ("_names", "_name", "_list"):
+        if param_name.endswith(suffix):
+            return param_name[: -len(suffix)]
+    if is_plural(param_name):
+        return param_name[:-1]
+    return param_name
+
+
+def wants_list(param_name: str, current_value: Any) -> bool:
+    return isinstance(current_value, list) or is_plural(param_name)
+
+
+def collect_values(payload: Any, keys: List[str], found: List[Any]):
+    """Depth-first walk collecting scalar values stored under any of keys."""
+    if isinstance(payload, dict):
+        if "error" in payload and len(payload) == 1:
+            return
+        for key, value in payload.items():
+            if key in keys and isinstance(value, (str, int, float)) and value != "":
+                found.append(value)
+            else:
+                collect_values(value, keys, found)
+    elif isinstance(payload, list):
+        for item in payload:
+            collect_values(item, keys, found)
+
+
+def resolve_param(param_name: str, current_value: Any, prior_results: list) -> Optional[Any]:
+    """
+    Pull a value for param_name out of earlier tool results, or None.
+
+    Values are taken in result order, so for ranked tools (top_n_pods_by_metric,
+    pod_restart_trend, ...) a singular param gets the top entry and a list
+    param gets every distinct entry.
+    """
+    stem = param_stem(param_name)
+    keys = [param_name, stem, f"{stem}_name"] + KEY_ALIASES.get(stem, [])
+
+    found: List[Any] = []
+    for prior in prior_results:
+        collect_values(result_payload(prior.get("result")), keys, found)
+
+    if not found:
+        return None
+    if wants_list(param_name, current_value):
+        return list(dict.fromkeys(found))
+    return found[0]
+
+
+def resolve_params(params: Dict[str, Any], prior_results: list) -> Dict[str, Any]:
+    """Return a copy of params with every empty value that can be resolved filled in."""
+    resolved = dict(params)
+    for name, value in params.items():
+        if is_unresolved(value):
+            candidate = resolve_param(name, value, prior_results)
+            if candidate is not None:
+                resolved[name] = candidate
+    return resolved
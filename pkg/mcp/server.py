@@ -1,6 +1,11 @@
 # mcp_server.py
 import asyncio
 import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 import pandas as pd
@@ -15,6 +20,107 @@ from influxdb_client.client.query_api import QueryApi
 app = FastMCP("Monitoring MCP Server")
 
 prometheus_clients: Dict[str, PrometheusConnect] = {}
+prometheus_timeouts: Dict[str, float] = {}
+
+DEFAULT_QUERY_TIMEOUT = 10.0
+DEFAULT_FANOUT_WORKERS = 32
+
+# Keep regex-matcher queries comfortably below common URL length limits
+# (Prometheus and most proxies accept at least 8 KB request lines).
+MAX_MATCHER_QUERY_LENGTH = 4000
+
+fanout_executor: Optional[ThreadPoolExecutor] = None
+
+
+class QueryCache:
+    """
+    Thread-safe TTL + LRU cache for Prometheus query results.
+
+    Concurrent lookups for a key that is already being fetched wait on the
+    in-flight request instead of issuing their own backend query.
+    """
+
+    def __init__(self, ttl_seconds: float = 15.0, max_entries: int = 1024, align_seconds: float = 15.0, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.align_seconds = align_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._in_flight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def align(self, ts: float) -> float:
+        """Round a unix timestamp down to the cache alignment step."""
+        if self.align_seconds <= 0:
+            return ts
+        return ts - (ts % self.align_seconds)
+
+    def get_or_fetch(self, key: tuple, fetch):
+        if not self.enabled:
+            return fetch()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        future.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+query_cache = QueryCache()
 
 def load_config():
     
@@ -30,25 +136,149 @@ def load_config():
     return prom_config
 
 def initialize_clients():
-    global prometheus_clients
+    global prometheus_clients, fanout_executor, query_cache
     
     prom_config = load_config()
+
+    cache_config = prom_config.get("query_cache", {}) or {}
+    query_cache = QueryCache(
+        ttl_seconds=float(cache_config.get("ttl_seconds", 15)),
+        max_entries=int(cache_config.get("max_entries", 1024)),
+        align_seconds=float(cache_config.get("align_seconds", 15)),
+        enabled=cache_config.get("enabled", True)
+    )
+    default_timeout = float(prom_config.get("query_timeout_seconds", DEFAULT_QUERY_TIMEOUT))
     
     for cfg in prom_config.get("prometheus_instances", []):
         name = cfg.get("name")
+        timeout = float(cfg.get("timeout_seconds", default_timeout))
         try:
             prometheus_clients[name] = PrometheusConnect(
                 url=cfg['base_url'],
                 headers=cfg.get('headers', {}),
-                disable_ssl=cfg.get('disable_ssl', False)
+                disable_ssl=cfg.get('disable_ssl', False),
+                timeout=timeout
             )
+            prometheus_timeouts[name] = timeout
             print(f"Initialized Prometheus client: {name} -> {cfg['base_url']}")
         except Exception as e:
             print(f"Failed to initialize Prometheus client {name}: {e}")
 
+    # One shared pool for every tool call, sized so that several concurrent
+    # tool invocations can each fan out to all instances at once.
+    workers = int(prom_config.get("fanout_workers", DEFAULT_FANOUT_WORKERS))
+    fanout_executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="prom-fanout")
+
 initialize_clients()
 
 
+def fan_out(query_fn) -> Dict[str, Any]:
+    """
+    Run query_fn(client) against every Prometheus instance concurrently.
+
+    Each instance gets its own deadline (``timeout_seconds`` in the instance
+    config, falling back to ``query_timeout_seconds``). Instances that raise or
+    miss their deadline are reported as ``{"error": ...}`` so the caller still
+    gets partial results from the healthy backends.
+    """
+    started = time.monotonic()
+    futures = {
+        prom_name: fanout_executor.submit(query_fn, client)
+        for prom_name, client in prometheus_clients.items()
+    }
+
+    all_results = {}
+    for prom_name, future in futures.items():
+        timeout = prometheus_timeouts.get(prom_name, DEFAULT_QUERY_TIMEOUT)
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        try:
+            all_results[prom_name] = future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            future.cancel()
+            all_results[prom_name] = {"error": f"Timed out after {timeout}s"}
+        except Exception as e:
+            all_results[prom_name] = {"error": str(e)}
+
+    return all_results
+
+
+def cached_query(client, query: str):
+    """
+    Instant query through the shared result cache.
+
+    The evaluation time is aligned down to ``query_cache.align_seconds`` so
+    callers within the same step share one cache entry and see identical data.
+    """
+    eval_time = query_cache.align(time.time())
+    key = ("query", client.url, query, eval_time)
+    return query_cache.get_or_fetch(
+        key, lambda: client.custom_query(query=query, params={"time": eval_time})
+    )
+
+
+def cached_query_range(client, query: str, start_time: datetime, end_time: datetime, step: str):
+    """Range query through the shared result cache, keyed on the exact range."""
+    key = ("query_range", client.url, query, start_time.isoformat(), end_time.isoformat(), step)
+    return query_cache.get_or_fetch(
+        key,
+        lambda: client.custom_query_range(query=query, start_time=start_time, end_time=end_time, step=step)
+    )
+
+
+def escape_promql_regex(value: str) -> str:
+    """Escape a literal label value for use inside a double-quoted =~ matcher."""
+    escaped = re.sub(r"([\\.+*?()|\[\]{}^$])", r"\\\1", value)
+    return escaped.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def pod_matcher_queries(pod_names: List[str], build_query) -> List[tuple]:
+    """
+    Group pods into as few ``pod=~"a|b|c"`` queries as possible.
+
+    build_query(matcher) renders the PromQL for one matcher string. Pods are
+    chunked so every rendered query stays under MAX_MATCHER_QUERY_LENGTH.
+    Returns a list of (query, pods_in_chunk).
+    """
+    chunks = []
+    chunk: List[str] = []
+    for pod_name in dict.fromkeys(pod_names):
+        candidate = chunk + [pod_name]
+        matcher = f'pod=~"{"|".join(escape_promql_regex(p) for p in candidate)}"'
+        if chunk and len(build_query(matcher)) > MAX_MATCHER_QUERY_LENGTH:
+            chunks.append(chunk)
+            chunk = [pod_name]
+        else:
+            chunk = candidate
+
+    if chunk:
+        chunks.append(chunk)
+
+    return [
+        (build_query(f'pod=~"{"|".join(escape_promql_regex(p) for p in c)}"'), c)
+        for c in chunks
+    ]
+
+
+def query_by_pod(client, matcher_queries: List[tuple]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run each (query, pods_in_chunk) of pod_matcher_queries() and demultiplex
+    by the ``pod`` label.
+
+    Returns pod -> {"query_index": index into matcher_queries,
+    "sample": first series for that pod or None}.
+    """
+    by_pod = {}
+    for query_index, (query, chunk) in enumerate(matcher_queries):
+        response = cached_query(client, query)
+        for pod_name in chunk:
+            by_pod[pod_name] = {"query_index": query_index, "sample": None}
+        for item in response or []:
+            pod_name = item.get("metric", {}).get("pod")
+            if pod_name in by_pod and by_pod[pod_name]["sample"] is None:
+                by_pod[pod_name]["sample"] = item
+    return by_pod
+
+
 @app.tool()
 def current_metric_for_pods(
     metric_name: str = "container_cpu_usage_seconds_total",
@@ -63,40 +293,35 @@ def current_metric_for_pods(
     if not pod_names:
         return {"error": "No pods provided"}
     
-    results = []
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
+    # One query per chunk of pods instead of one per pod; the queries are
+    # listed once and each pod refers to its query by index
+    matcher_queries = pod_matcher_queries(pod_names, lambda matcher: f"{metric_name}{{{matcher}}}")
+
+    def query_instance(client):
+        by_pod = query_by_pod(client, matcher_queries)
+
         results = []
-        try:
-            for pod_name in pod_names:
-                # PromQL query for the given pod
-                query = f"{metric_name}{{pod='{pod_name}'}}"
-                
-                # Query Prometheus for current value
-                response = client.custom_query(query=query)
-                
-                # Extract latest value if available
-                value = None
-                if response and len(response) > 0:
-                    try:
-                        value = float(response[0]['value'][1])
-                    except (KeyError, ValueError, IndexError):
-                        value = None
-                
-                results.append({
-                    "pod": pod_name,
-                    "query": query,
-                    "current_cpu_value": value
-                })  
+        for pod_name in pod_names:
+            # Extract latest value if available
+            value = None
+            sample = by_pod[pod_name]["sample"]
+            if sample:
+                try:
+                    value = float(sample['value'][1])
+                except (KeyError, ValueError, IndexError):
+                    value = None
             
-        except Exception as e:
-            return {"error": f"Failed to query Prometheus: {str(e)}"}
-
-        all_results[prom_name] = results
+            results.append({
+                "pod": pod_name,
+                "query_index": by_pod[pod_name]["query_index"],
+                "current_cpu_value": value
+            })  
+        return results
 
     return {
                 "metric": metric_name,
-                "pods_current_cpu_per_prometheus": all_results,
+                "queries": [query for query, _ in matcher_queries],
+                "pods_current_cpu_per_prometheus": fan_out(query_instance),
                 "timestamp": datetime.now().isoformat()
             }
 
@@ -111,35 +336,26 @@ def top_n_pods_by_metric(
     if not prometheus_clients:
         return {"error": "Prometheus client not initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        results = []
-        try:
-            # Filter metrics with a pod label
-            query = f'topk({top_n}, avg_over_time({metric_name}{{pod!=""}}[{window}]))'
-            result = client.custom_query(query=query)
-
-            # Extract pod names and CPU usage values
-            pods_info = []
-            for item in result:
-                metric = item.get("metric", {})
-                pod_name = metric.get("pod")  # only include if pod exists
-                value = float(item.get("value", [0, "0"])[1])
-                if pod_name:
-                    pods_info.append({"pod": pod_name, "value": value})
-
-            # Sort by CPU usage descending
-            pods_info.sort(key=lambda x: x["value"], reverse=True)
+    def query_instance(client):
+        # Filter metrics with a pod label
+        query = f'topk({top_n}, avg_over_time({metric_name}{{pod!=""}}[{window}]))'
+        result = cached_query(client, query)
 
-            
+        # Extract pod names and CPU usage values
+        pods_info = []
+        for item in result:
+            metric = item.get("metric", {})
+            pod_name = metric.get("pod")  # only include if pod exists
+            value = float(item.get("value", [0, "0"])[1])
+            if pod_name:
+                pods_info.append({"pod": pod_name, "value": value})
 
-        except Exception as e:
-            return {"error": str(e)}
-        
-        all_results[prom_name] = pods_info
+        # Sort by CPU usage descending
+        pods_info.sort(key=lambda x: x["value"], reverse=True)
+        return pods_info
 
     return {
-            "pods_per_prometheus": all_results,
+            "pods_per_prometheus": fan_out(query_instance),
             "timestamp": datetime.now().isoformat()
         }
 
@@ -149,44 +365,40 @@ def pod_network_io(pod_names: Optional[List[str]] = None) -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "Prometheus client not initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
+    rx_queries = pod_matcher_queries(pod_names or [], lambda matcher: f'rate(container_network_receive_bytes_total{{{matcher}}}[5m])')
+    tx_queries = pod_matcher_queries(pod_names or [], lambda matcher: f'rate(container_network_transmit_bytes_total{{{matcher}}}[5m])')
+
+    def query_instance(client):
+        if not pod_names:
+            return []
+
+        rx_by_pod = query_by_pod(client, rx_queries)
+        tx_by_pod = query_by_pod(client, tx_queries)
+
         results = []
-        try:
-            results = []
-            for pod_name in pod_names or []:
-                rx_query = f'rate(container_network_receive_bytes_total{{pod="{pod_name}"}}[5m])'
-                tx_query = f'rate(container_network_transmit_bytes_total{{pod="{pod_name}"}}[5m])'
-                rx_result = client.custom_query(rx_query)
-                tx_result = client.custom_query(tx_query)
-                rx = float(rx_result[0]['value'][1]) if rx_result else 0
-                tx = float(tx_result[0]['value'][1]) if tx_result else 0
-                results.append({"pod": pod_name, "rx_bytes_per_sec": rx, "tx_bytes_per_sec": tx})
-            
-        except Exception as e:
-            return {"error": str(e)}
-        all_results[prom_name] = results
+        for pod_name in pod_names:
+            rx_sample = rx_by_pod[pod_name]["sample"]
+            tx_sample = tx_by_pod[pod_name]["sample"]
+            rx = float(rx_sample['value'][1]) if rx_sample else 0
+            tx = float(tx_sample['value'][1]) if tx_sample else 0
+            results.append({"pod": pod_name, "rx_bytes_per_sec": rx, "tx_bytes_per_sec": tx})
+        return results
     
-    return {"pod_network_io_per_promotheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"pod_network_io_per_promotheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 @app.tool()
 def pods_exceeding_cpu(threshold: float = 0.8) -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = f'rate(container_cpu_usage_seconds_total[5m]) > {threshold}'
-            result = client.custom_query(query=query)
-            pods = [{"pod": item["metric"]["pod"], "cpu_value": float(item["value"][1])} 
-                    for item in result if "pod" in item["metric"]]
-            all_results[prom_name] = pods
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = f'rate(container_cpu_usage_seconds_total[5m]) > {threshold}'
+        result = cached_query(client, query)
+        return [{"pod": item["metric"]["pod"], "cpu_value": float(item["value"][1])} 
+                for item in result if "pod" in item["metric"]]
 
     return {
-        "pods_exceeding_cpu_per_prometheus": all_results,
+        "pods_exceeding_cpu_per_prometheus": fan_out(query_instance),
         "threshold": threshold,
         "timestamp": datetime.now().isoformat()
     }
@@ -197,20 +409,16 @@ def pod_status_summary() -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = 'sum(kube_pod_status_phase) by (phase)'
-            result = client.custom_query(query=query)
-            status_summary = {item["metric"]["phase"]: int(float(item["value"][1])) for item in result}
-            total = sum(status_summary.values())
-            status_summary["total"] = total
-            all_results[prom_name] = status_summary
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = 'sum(kube_pod_status_phase) by (phase)'
+        result = cached_query(client, query)
+        status_summary = {item["metric"]["phase"]: int(float(item["value"][1])) for item in result}
+        total = sum(status_summary.values())
+        status_summary["total"] = total
+        return status_summary
 
     return {
-        "pod_status_summary_per_prometheus": all_results,
+        "pod_status_summary_per_prometheus": fan_out(query_instance),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -219,26 +427,22 @@ def recent_pod_events(limit: int = 10) -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = 'sort_desc(sum by (reason, involved_object_name) (increase(kube_event_count[10m])))'
-            result = client.custom_query(query=query)
-            
-            events = []
-            for item in result[:limit]:
-                metric = item.get("metric", {})
-                events.append({
-                    "pod": metric.get("involved_object_name"),
-                    "reason": metric.get("reason"),
-                    "count": int(float(item["value"][1]))
-                })
-            all_results[prom_name] = events
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = 'sort_desc(sum by (reason, involved_object_name) (increase(kube_event_count[10m])))'
+        result = cached_query(client, query)
+        
+        events = []
+        for item in result[:limit]:
+            metric = item.get("metric", {})
+            events.append({
+                "pod": metric.get("involved_object_name"),
+                "reason": metric.get("reason"),
+                "count": int(float(item["value"][1]))
+            })
+        return events
 
     return {
-        "recent_pod_events_per_prometheus": all_results,
+        "recent_pod_events_per_prometheus": fan_out(query_instance),
         "lookback": "10m",
         "timestamp": datetime.now().isoformat()
     }
@@ -259,69 +463,66 @@ def node_disk_usage(window_minutes: int = 20) -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    end_time = datetime.utcnow()
+    # Align the range to the cache step so repeated calls share a cache entry
+    end_time = datetime.utcfromtimestamp(query_cache.align(time.time()))
     start_time = end_time - timedelta(minutes=window_minutes)
     step = "1m"  # 1-minute resolution
 
     important_mounts = {"/", "/var/lib", "/data"}
-    all_results = {}
 
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = """
-            100 * (1 - (node_filesystem_avail_bytes{fstype!~"tmpfs|overlay"} 
-                        / node_filesystem_size_bytes{fstype!~"tmpfs|overlay"}))
-            """
-
-            result = client.custom_query_range(
-                query=query.strip(),
-                start_time=start_time,
-                end_time=end_time,
-                step=step
-            )
+    def query_instance(client):
+        query = """
+        100 * (1 - (node_filesystem_avail_bytes{fstype!~"tmpfs|overlay"} 
+                    / node_filesystem_size_bytes{fstype!~"tmpfs|overlay"}))
+        """
+
+        result = cached_query_range(
+            client,
+            query=query.strip(),
+            start_time=start_time,
+            end_time=end_time,
+            step=step
+        )
+
+        disk_usage = []
+        for item in result:
+            metric = item.get("metric", {})
+            mount = metric.get("mountpoint", "")
+            if mount not in important_mounts:
+                continue
 
-            disk_usage = []
-            for item in result:
-                metric = item.get("metric", {})
-                mount = metric.get("mountpoint", "")
-                if mount not in important_mounts:
-                    continue
-
-                node = metric.get("node", "unknown")
-                cluster = metric.get("cluster", "unknown")
-                region = metric.get("region", "unknown")
-                environment = metric.get("environment", "unknown")
-
-                # Average usage across time range
-                values = [float(v[1]) for v in item.get("values", [])]
-                if not values:
-                    continue
-                avg_usage = sum(values) / len(values)
-
-                disk_usage.append({
-                    "node": node,
-                    "mount": mount,
-                    "cluster": cluster,
-                    "region": region,
-                    "environment": environment,
-                    "avg_disk_usage_percent": round(avg_usage, 2),
-                    "max_disk_usage_percent": round(max(values), 2),
-                })
-
-            disk_usage.sort(key=lambda x: x["max_disk_usage_percent"], reverse=True)
-
-            all_results[prom_name] = {
-                "query": query.strip(),
-                "window_minutes": window_minutes,
-                "timestamp": end_time.isoformat(),
-                "top_nodes": disk_usage[:10],
-            }
+            node = metric.get("node", "unknown")
+            cluster = metric.get("cluster", "unknown")
+            region = metric.get("region", "unknown")
+            environment = metric.get("environment", "unknown")
 
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+            # Average usage across time range
+            values = [float(v[1]) for v in item.get("values", [])]
+            if not values:
+                continue
+            avg_usage = sum(values) / len(values)
+
+            disk_usage.append({
+                "node": node,
+                "mount": mount,
+                "cluster": cluster,
+                "region": region,
+                "environment": environment,
+                "avg_disk_usage_percent": round(avg_usage, 2),
+                "max_disk_usage_percent": round(max(values), 2),
+            })
+
+        disk_usage.sort(key=lambda x: x["max_disk_usage_percent"], reverse=True)
+
+        return {
+            "query": query.strip(),
+            "window_minutes": window_minutes,
+            "timestamp": end_time.isoformat(),
+            "top_nodes": disk_usage[:10],
+        }
 
     return {
-        "node_disk_usage_per_prometheus": all_results,
+        "node_disk_usage_per_prometheus": fan_out(query_instance),
         "fetched_at": datetime.utcnow().isoformat(),
     }
 
@@ -331,29 +532,25 @@ def describe_cluster_health() -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = 'sum(kube_pod_status_phase) by (phase)'
-            result = client.custom_query(query=query)
-            summary = {item["metric"]["phase"]: int(float(item["value"][1])) for item in result}
-            total = sum(summary.values())
-            running = summary.get("Running", 0)
-            pending = summary.get("Pending", 0)
-            failed = summary.get("Failed", 0)
-
-            if failed > 0:
-                status_msg = f"{failed} pods are failing. {running}/{total} pods are running."
-            elif pending > 0:
-                status_msg = f"{pending} pods are pending. {running}/{total} are running fine."
-            else:
-                status_msg = f"All systems nominal: {running}/{total} pods are healthy."
+    def query_instance(client):
+        query = 'sum(kube_pod_status_phase) by (phase)'
+        result = cached_query(client, query)
+        summary = {item["metric"]["phase"]: int(float(item["value"][1])) for item in result}
+        total = sum(summary.values())
+        running = summary.get("Running", 0)
+        pending = summary.get("Pending", 0)
+        failed = summary.get("Failed", 0)
 
-            all_results[prom_name] = {"summary": summary, "message": status_msg}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+        if failed > 0:
+            status_msg = f"{failed} pods are failing. {running}/{total} pods are running."
+        elif pending > 0:
+            status_msg = f"{pending} pods are pending. {running}/{total} are running fine."
+        else:
+            status_msg = f"All systems nominal: {running}/{total} pods are healthy."
 
-    return {"cluster_health_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+        return {"summary": summary, "message": status_msg}
+
+    return {"cluster_health_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 @app.tool()
@@ -361,32 +558,28 @@ def top_disk_pressure_nodes(threshold: float = 80.0, top_n: int = 5) -> Dict[str
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = """
-            100 * (1 - (node_filesystem_avail_bytes{fstype!~"tmpfs|overlay"} 
-                        / node_filesystem_size_bytes{fstype!~"tmpfs|overlay"}))
-            """
-            result = client.custom_query(query=query)
-            nodes_info = []
-            for item in result:
-                metric = item.get("metric", {})
-                node = metric.get("instance")
-                mount = metric.get("mountpoint", "")
-                usage = float(item.get("value", [0, "0"])[1])
-                if usage >= threshold:
-                    nodes_info.append({"node": node, "mount": mount, "usage_percent": round(usage, 2)})
-
-            nodes_info.sort(key=lambda x: x["usage_percent"], reverse=True)
-            nodes_info = nodes_info[:top_n]
-
-            msg = f"⚠️ {len(nodes_info)} nodes above {threshold}% disk usage." if nodes_info else "✅ No nodes are under disk pressure."
-            all_results[prom_name] = {"nodes": nodes_info, "message": msg, "threshold": threshold}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = """
+        100 * (1 - (node_filesystem_avail_bytes{fstype!~"tmpfs|overlay"} 
+                    / node_filesystem_size_bytes{fstype!~"tmpfs|overlay"}))
+        """
+        result = cached_query(client, query)
+        nodes_info = []
+        for item in result:
+            metric = item.get("metric", {})
+            node = metric.get("instance")
+            mount = metric.get("mountpoint", "")
+            usage = float(item.get("value", [0, "0"])[1])
+            if usage >= threshold:
+                nodes_info.append({"node": node, "mount": mount, "usage_percent": round(usage, 2)})
+
+        nodes_info.sort(key=lambda x: x["usage_percent"], reverse=True)
+        nodes_info = nodes_info[:top_n]
+
+        msg = f"⚠️ {len(nodes_info)} nodes above {threshold}% disk usage." if nodes_info else "✅ No nodes are under disk pressure."
+        return {"nodes": nodes_info, "message": msg, "threshold": threshold}
 
-    return {"top_disk_pressure_nodes_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"top_disk_pressure_nodes_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 
@@ -395,27 +588,23 @@ def pod_restart_trend(window: str = "30m", top_n: int = 5) -> Dict[str, Any]:
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = f'topk({top_n}, increase(kube_pod_container_status_restarts_total[{window}]))'
-            result = client.custom_query(query=query)
-            restart_trends = []
-            for item in result:
-                metric = item.get("metric", {})
-                pod = metric.get("pod")
-                container = metric.get("container", "")
-                restarts = float(item.get("value", [0, "0"])[1])
-                if pod:
-                    restart_trends.append({"pod": pod, "container": container, "restarts": restarts})
-
-            restart_trends.sort(key=lambda x: x["restarts"], reverse=True)
-            msg = f"⚠️ Pods with recent restarts detected (last {window})." if restart_trends else f"✅ No recent restarts in the last {window}."
-            all_results[prom_name] = {"pods": restart_trends, "message": msg, "window": window}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = f'topk({top_n}, increase(kube_pod_container_status_restarts_total[{window}]))'
+        result = cached_query(client, query)
+        restart_trends = []
+        for item in result:
+            metric = item.get("metric", {})
+            pod = metric.get("pod")
+            container = metric.get("container", "")
+            restarts = float(item.get("value", [0, "0"])[1])
+            if pod:
+                restart_trends.append({"pod": pod, "container": container, "restarts": restarts})
 
-    return {"pod_restart_trend_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+        restart_trends.sort(key=lambda x: x["restarts"], reverse=True)
+        msg = f"⚠️ Pods with recent restarts detected (last {window})." if restart_trends else f"✅ No recent restarts in the last {window}."
+        return {"pods": restart_trends, "message": msg, "window": window}
+
+    return {"pod_restart_trend_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 @app.tool()
@@ -423,31 +612,26 @@ def detect_pod_anomalies(metric_name="container_cpu_usage_seconds_total", z_thre
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = f'avg_over_time({metric_name}{{pod!=""}}[15m])'
-            result = client.custom_query(query=query)
-            values = [float(r["value"][1]) for r in result]
-            if not values:
-                all_results[prom_name] = {"message": "No data"}
-                continue
+    def query_instance(client):
+        query = f'avg_over_time({metric_name}{{pod!=""}}[15m])'
+        result = cached_query(client, query)
+        values = [float(r["value"][1]) for r in result]
+        if not values:
+            return {"message": "No data"}
 
-            mean = sum(values)/len(values)
-            std = (sum((x-mean)**2 for x in values)/len(values))**0.5
-            anomalies = []
-            for r in result:
-                pod = r["metric"].get("pod")
-                val = float(r["value"][1])
-                z = (val - mean)/std if std > 0 else 0
-                if abs(z) > z_threshold:
-                    anomalies.append({"pod": pod, "value": val, "z_score": round(z,2)})
-
-            all_results[prom_name] = {"anomalies": anomalies, "mean": mean, "std": std}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+        mean = sum(values)/len(values)
+        std = (sum((x-mean)**2 for x in values)/len(values))**0.5
+        anomalies = []
+        for r in result:
+            pod = r["metric"].get("pod")
+            val = float(r["value"][1])
+            z = (val - mean)/std if std > 0 else 0
+            if abs(z) > z_threshold:
+                anomalies.append({"pod": pod, "value": val, "z_score": round(z,2)})
 
-    return {"pod_anomalies_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+        return {"anomalies": anomalies, "mean": mean, "std": std}
+
+    return {"pod_anomalies_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 @app.tool()
@@ -455,23 +639,19 @@ def namespace_resource_summary(resource="cpu", window="5m"):
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
     metric = "container_cpu_usage_seconds_total" if resource=="cpu" else "container_memory_usage_bytes"
 
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = f'sum(rate({metric}{{namespace!=""}}[{window}])) by (namespace)'
-            result = client.custom_query(query=query)
-            usage = [{"namespace": r["metric"]["namespace"], "value": float(r["value"][1])} for r in result]
-            total = sum(x["value"] for x in usage)
-            for x in usage:
-                x["percent_of_total"] = round((x["value"]/total)*100, 2) if total > 0 else 0
-            usage.sort(key=lambda x: x["value"], reverse=True)
-            all_results[prom_name] = {"resource": resource, "usage_by_namespace": usage}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = f'sum(rate({metric}{{namespace!=""}}[{window}])) by (namespace)'
+        result = cached_query(client, query)
+        usage = [{"namespace": r["metric"]["namespace"], "value": float(r["value"][1])} for r in result]
+        total = sum(x["value"] for x in usage)
+        for x in usage:
+            x["percent_of_total"] = round((x["value"]/total)*100, 2) if total > 0 else 0
+        usage.sort(key=lambda x: x["value"], reverse=True)
+        return {"resource": resource, "usage_by_namespace": usage}
 
-    return {"namespace_resource_summary_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"namespace_resource_summary_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 
@@ -480,17 +660,13 @@ def detect_crashloop_pods(window="10m", threshold=2):
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = f'increase(kube_pod_container_status_restarts_total[{window}]) > {threshold}'
-            result = client.custom_query(query=query)
-            pods = [{"pod": r["metric"]["pod"], "restarts": int(float(r["value"][1]))} for r in result if "pod" in r["metric"]]
-            all_results[prom_name] = {"crashloop_pods": pods, "window": window}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = f'increase(kube_pod_container_status_restarts_total[{window}]) > {threshold}'
+        result = cached_query(client, query)
+        pods = [{"pod": r["metric"]["pod"], "restarts": int(float(r["value"][1]))} for r in result if "pod" in r["metric"]]
+        return {"crashloop_pods": pods, "window": window}
 
-    return {"crashloop_pods_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"crashloop_pods_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 @app.tool()
@@ -499,25 +675,20 @@ def correlate_metrics(metric_a="container_cpu_usage_seconds_total", metric_b="co
         return {"error": "No Prometheus clients initialized"}
 
     import numpy as np
-    all_results = {}
 
-    for prom_name, client in prometheus_clients.items():
-        try:
-            r1 = client.custom_query(f'rate({metric_a}[{window}])')
-            r2 = client.custom_query(f'rate({metric_b}[{window}])')
-            data_a = {r["metric"].get("pod"): float(r["value"][1]) for r in r1 if "pod" in r["metric"]}
-            data_b = {r["metric"].get("pod"): float(r["value"][1]) for r in r2 if "pod" in r["metric"]}
-            common_pods = set(data_a) & set(data_b)
-            if not common_pods:
-                all_results[prom_name] = {"message": "No overlapping pods"}
-                continue
-            pairs = [(data_a[p], data_b[p]) for p in common_pods]
-            corr = float(np.corrcoef([x for x, _ in pairs], [y for _, y in pairs])[0,1])
-            all_results[prom_name] = {"correlation": round(corr, 3), "metric_a": metric_a, "metric_b": metric_b, "window": window}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        r1 = cached_query(client, f'rate({metric_a}[{window}])')
+        r2 = cached_query(client, f'rate({metric_b}[{window}])')
+        data_a = {r["metric"].get("pod"): float(r["value"][1]) for r in r1 if "pod" in r["metric"]}
+        data_b = {r["metric"].get("pod"): float(r["value"][1]) for r in r2 if "pod" in r["metric"]}
+        common_pods = set(data_a) & set(data_b)
+        if not common_pods:
+            return {"message": "No overlapping pods"}
+        pairs = [(data_a[p], data_b[p]) for p in common_pods]
+        corr = float(np.corrcoef([x for x, _ in pairs], [y for _, y in pairs])[0,1])
+        return {"correlation": round(corr, 3), "metric_a": metric_a, "metric_b": metric_b, "window": window}
 
-    return {"correlation_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"correlation_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 
@@ -526,25 +697,21 @@ def pod_event_timeline(pod_name: str, window: str = "30m"):
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
     queries = {
         "restarts": f'increase(kube_pod_container_status_restarts_total{{pod="{pod_name}"}}[{window}])',
         "network_rx": f'rate(container_network_receive_bytes_total{{pod="{pod_name}"}}[{window}])',
         "cpu": f'rate(container_cpu_usage_seconds_total{{pod="{pod_name}"}}[{window}])',
     }
 
-    for prom_name, client in prometheus_clients.items():
-        try:
-            timeline = {}
-            for key, q in queries.items():
-                result = client.custom_query(q)
-                if result:
-                    timeline[key] = float(result[0]["value"][1])
-            all_results[prom_name] = {"pod": pod_name, "timeline": timeline, "window": window}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        timeline = {}
+        for key, q in queries.items():
+            result = cached_query(client, q)
+            if result:
+                timeline[key] = float(result[0]["value"][1])
+        return {"pod": pod_name, "timeline": timeline, "window": window}
 
-    return {"pod_event_timeline_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+    return {"pod_event_timeline_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
 
 
 
@@ -553,19 +720,24 @@ def node_condition_summary():
     if not prometheus_clients:
         return {"error": "No Prometheus clients initialized"}
 
-    all_results = {}
-    for prom_name, client in prometheus_clients.items():
-        try:
-            query = 'kube_node_status_condition{status="true", condition!="Ready"}'
-            result = client.custom_query(query=query)
-            issues = [{"node": r["metric"]["node"], "condition": r["metric"]["condition"]} for r in result]
-            all_results[prom_name] = {"node_issues": issues}
-        except Exception as e:
-            all_results[prom_name] = {"error": str(e)}
+    def query_instance(client):
+        query = 'kube_node_status_condition{status="true", condition!="Ready"}'
+        result = cached_query(client, query)
+        issues = [{"node": r["metric"]["node"], "condition": r["metric"]["condition"]} for r in result]
+        return {"node_issues": issues}
+
+    return {"node_condition_summary_per_prometheus": fan_out(query_instance), "timestamp": datetime.now().isoformat()}
+
 
-    return {"node_condition_summary_per_prometheus": all_results, "timestamp": datetime.now().isoformat()}
+
+@app.tool()
+def query_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters for the server-side Prometheus query cache.
+    """
+    return {"query_cache": query_cache.stats(), "timestamp": datetime.now().isoformat()}
 
 
 
 if __name__ == "__main__":
-    app.run()
+    app.run()
\ No newline at end of file
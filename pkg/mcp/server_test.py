@@ -24,7 +24,8 @@ tools = [
     ("detect_crashloop_pods", {"window": "10m", "threshold": 2}),
     ("correlate_metrics", {"metric_a": "container_cpu_usage_seconds_total", "metric_b": "container_network_receive_bytes_total", "window": "10m"}),
     ("pod_event_timeline", {"pod_name": example_pods[0], "window": "30m"}),
-    ("node_condition_summary", {})
+    ("node_condition_summary", {}),
+    ("query_cache_stats", {})
 ]
 
 @pytest.mark.asyncio
@@ -0,0 +1,73 @@
+"""Configuration for the Kubernetes metrics generator and pusher"""
+
+import json
+
+GIB = 1024 * 1024 * 1024
+MIB = 1024 * 1024
+
+
+class Config:
+    """Configuration class for Prometheus connection and data generation"""
+    def __init__(self, config_file: str = None, prometheus_url: str = None):
+        if config_file:
+            with open(config_file, 'r') as f:
+                config = json.load(f)
+                self.prometheus_url = config.get('prometheus_url')
+                self.auth_token = config.get('auth_token')
+                self.num_clusters = config.get('num_clusters', 10)
+                self.nodes_per_cluster = config.get('nodes_per_cluster', 50)
+                self.namespaces_per_cluster = config.get('namespaces_per_cluster', 20)
+                self.pods_per_namespace = config.get('pods_per_namespace', 30)
+                self.containers_per_pod = config.get('containers_per_pod', 3)
+                self.scrape_interval = config.get('scrape_interval', 30)
+                self.batch_size = config.get('batch_size', 1000)
+                self.days_of_history = config.get('days_of_history', 365)
+                self.series_major = config.get('series_major', False)
+                self.samples_per_series = config.get('samples_per_series', 120)
+                self.sender_threads = config.get('sender_threads', 4)
+                self.generator_processes = config.get('generator_processes', 2)
+                self.queue_size = config.get('queue_size', 8)
+                self.max_retries = config.get('max_retries', 5)
+                self.retry_backoff_seconds = config.get('retry_backoff_seconds', 0.5)
+                self.target_latency_seconds = config.get('target_latency_seconds', 1.0)
+                self.seed = config.get('seed')
+                self.checkpoint_file = config.get('checkpoint_file', 'prometheus_pusher_checkpoint.json')
+                self.checkpoint_interval_seconds = config.get('checkpoint_interval_seconds', 5.0)
+                self.churn_epoch_seconds = config.get('churn_epoch_seconds', 3600)
+                self.pod_restart_probability = config.get('pod_restart_probability', 0.0)
+                self.rollout_probability = config.get('rollout_probability', 0.0)
+                self.metric_families = config.get('metric_families')
+        else:
+            self.prometheus_url = prometheus_url or "http://localhost:9090/api/v1/write"
+            self.auth_token = None
+            self.num_clusters = 10
+            self.nodes_per_cluster = 50
+            self.namespaces_per_cluster = 20
+            self.pods_per_namespace = 30
+            self.containers_per_pod = 3
+            self.scrape_interval = 30  # seconds
+            self.batch_size = 1000
+            self.days_of_history = 365
+            self.series_major = False  # send many samples per series instead of one
+            self.samples_per_series = 120
+            self.sender_threads = 4  # one per time shard
+            self.generator_processes = 2  # 0 generates in the main process
+            self.queue_size = 8  # batches buffered per sender before generation blocks
+            self.max_retries = 5
+            self.retry_backoff_seconds = 0.5
+            self.target_latency_seconds = 1.0  # send latency the rate controller aims for
+            self.seed = None  # random per run unless set; stored in the checkpoint
+            self.checkpoint_file = 'prometheus_pusher_checkpoint.json'
+            self.checkpoint_interval_seconds = 5.0
+            self.churn_epoch_seconds = 3600  # topology changes happen on epoch boundaries
+            self.pod_restart_probability = 0.0  # mean container restarts per epoch
+            self.rollout_probability = 0.0  # chance per epoch that a pod is replaced by a rollout
+            self.metric_families = None  # names of registered families to generate; None means all
+
+
+# Config values a checkpoint pins: changing any of them changes the generated data
+CHECKPOINT_SETTINGS = [
+    'num_clusters', 'nodes_per_cluster', 'namespaces_per_cluster', 'pods_per_namespace',
+    'containers_per_pod', 'scrape_interval', 'batch_size', 'series_major', 'samples_per_series',
+    'churn_epoch_seconds', 'pod_restart_probability', 'rollout_probability', 'metric_families',
+]
@@ -0,0 +1,150 @@
+"""Vectorized generation engine: topology + metric family plugins -> SeriesBlocks"""
+
+import random
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from .config import Config
+from .families import MetricFamily, load_families
+from .topology import ClusterTopology
+
+
+class SeriesBlock:
+    """
+    Columnar batch of samples.
+
+    Row i of ``values`` holds the samples of the series labelled ``labels[i]``
+    at every timestamp in ``timestamps``. Label dicts are shared, never copied.
+    """
+
+    def __init__(self, labels: List[Dict[str, str]], timestamps: np.ndarray, values: np.ndarray):
+        self.labels = labels
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self) -> int:
+        return self.values.size
+
+    def to_remote_write(self, series_major: bool = False) -> List[Dict]:
+        """
+        Remote-write time series for this block.
+
+        By default every sample is its own single-sample time series, ordered
+        by timestamp. With ``series_major`` each series is sent once carrying
+        all of its samples, so the label set goes on the wire once per block.
+        """
+        if series_major:
+            timestamps = self.timestamps.tolist()
+            return [
+                {'metric': labels, 'values': row, 'timestamps': timestamps}
+                for labels, row in zip(self.labels, self.values.tolist())
+            ]
+        return [
+            {'metric': labels, 'values': [value], 'timestamps': [timestamp]}
+            for timestamp, row in zip(self.timestamps.tolist(), self.values.T.tolist())
+            for labels, value in zip(self.labels, row)
+        ]
+
+
+class KubernetesMetricsGenerator:
+    """Generate realistic Kubernetes metrics with high cardinality"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.seed = config.seed if config.seed is not None else random.SystemRandom().randrange(2 ** 32)
+        self.rng = np.random.default_rng(self.seed)
+        # The inventory comes from the seed, so series identities are stable across runs
+        self.topology = ClusterTopology(config, self.seed)
+        self.families = load_families(config.metric_families)
+        self.current_epoch = 0
+        self._epoch_labels = OrderedDict()
+        self._build_series()
+
+    def _build_series(self):
+        """
+        Build every label set once from the topology.
+
+        Per-sample work is then limited to generating value arrays; label dicts
+        (including ``__name__``) are built here and shared by every sample.
+        Offsets of container rows are kept so rollouts can swap them per epoch.
+        """
+        self.series_labels: List[Dict[str, str]] = []
+        self._container_blocks = []
+        for family in self.families:
+            labels = self.topology.labels(family.target)
+            for metric_name in family.metrics:
+                if family.target == 'container':
+                    self._container_blocks.append((len(self.series_labels), family, metric_name))
+                self.series_labels.extend(self._metric_labels(family, metric_name, labels))
+
+    def _metric_labels(self, family: MetricFamily, metric_name: str,
+                       labels: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        return [
+            {**base, **family.row_labels(self.topology, metric_name, row), '__name__': metric_name}
+            for row, base in enumerate(labels)
+        ]
+
+    def labels_at(self, epoch: int) -> List[Dict[str, str]]:
+        """Series label sets at an epoch (the same list every epoch without rollouts)"""
+        if not self.topology.rollouts:
+            return self.series_labels
+        labels = self._epoch_labels.get(epoch)
+        if labels is None:
+            container_labels = self.topology.container_labels_at(epoch)
+            labels = list(self.series_labels)
+            for offset, family, metric_name in self._container_blocks:
+                labels[offset:offset + len(container_labels)] = self._metric_labels(family, metric_name, container_labels)
+            self._epoch_labels[epoch] = labels
+            while len(self._epoch_labels) > 4:
+                self._epoch_labels.popitem(last=False)
+        return labels
+
+    @property
+    def series_count(self) -> int:
+        """Series reported by every scrape"""
+        return len(self.series_labels)
+
+    def distinct_series(self, start_ms: int, end_ms: int) -> int:
+        """Exact number of distinct series over a time range, counting rollout replacements"""
+        topology = self.topology
+        revisions = topology.pod_revisions(topology.epoch(end_ms)) - topology.pod_revisions(topology.epoch(start_ms))
+        replaced_containers = int(revisions[topology.container_pod].sum()) if len(topology.container_pod) else 0
+        container_metrics = sum(len(family.metrics) for family in self.families if family.target == 'container')
+        return self.series_count + replaced_containers * container_metrics
+
+    def generate_block(self, timestamps: List[int]) -> SeriesBlock:
+        """
+        Generate every series for all given timestamps (ms) in one vectorized pass.
+
+        Values are drawn from a stream seeded by the generator seed and the
+        block's first timestamp, so regenerating a block gives the same data.
+        Series labels are those of the churn epoch of the first timestamp; use
+        ``generate_blocks`` for ranges that may cross an epoch boundary.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if len(timestamps):
+            self.rng = np.random.default_rng([self.seed, int(timestamps[0])])
+            self.current_epoch = self.topology.epoch(timestamps[0])
+        rows = []
+        for family in self.families:
+            labels = self.topology.labels(family.target)
+            if labels:
+                values = family.generate(self, (len(labels), len(timestamps)))
+                rows.extend(values[metric_name] for metric_name in family.metrics)
+        values = np.vstack(rows) if rows else np.empty((0, len(timestamps)))
+        return SeriesBlock(self.labels_at(self.current_epoch), timestamps, values)
+
+    def generate_blocks(self, timestamps: List[int]) -> List[SeriesBlock]:
+        """Generate timestamps as one block per churn epoch they span"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if not self.topology.churn or len(timestamps) == 0:
+            return [self.generate_block(timestamps)]
+        epochs = timestamps // self.topology.epoch_ms
+        splits = np.flatnonzero(np.diff(epochs)) + 1
+        return [self.generate_block(part) for part in np.split(timestamps, splits)]
+
+    def generate_all_metrics(self, timestamp: int) -> List[Dict]:
+        """Generate all metrics for all clusters, nodes, pods, and containers"""
+        return self.generate_block([timestamp]).to_remote_write()
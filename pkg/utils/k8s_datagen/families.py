@@ -0,0 +1,204 @@
+"""
+Metric family plugins.
+
+A family generates a group of metrics for one kind of object. Register new
+families with ``@register_family``; ``metric_families`` in the config picks
+which registered families are generated (all of them by default, in
+registration order).
+"""
+
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .config import GIB, MIB
+
+FAMILIES: Dict[str, Type["MetricFamily"]] = {}
+
+PHASES = {0: "Pending", 1: "Running", 2: "Succeeded", 3: "Failed"}
+
+
+def register_family(cls: Type["MetricFamily"]) -> Type["MetricFamily"]:
+    FAMILIES[cls.name] = cls
+    return cls
+
+
+def load_families(names: Optional[List[str]] = None) -> List["MetricFamily"]:
+    """Instantiate the named families, or every registered family when names is None"""
+    names = list(FAMILIES) if names is None else names
+    unknown = [name for name in names if name not in FAMILIES]
+    if unknown:
+        raise ValueError(f"Unknown metric families {unknown}. Available: {', '.join(FAMILIES)}")
+    return [FAMILIES[name]() for name in names]
+
+
+class MetricFamily:
+    """
+    Base class for a metric family plugin.
+
+    ``target`` selects the topology label sets the family is generated for
+    ("node", "container" or "filesystem"). ``generate`` returns
+    {metric name: array of shape (rows, n_timestamps)} for every name in
+    ``metrics``, drawing randomness from ``generator.rng``.
+    """
+
+    name = ""
+    target = "container"
+    metrics: List[str] = []
+
+    def row_labels(self, topology, metric_name: str, row: int) -> Dict[str, str]:
+        """Extra labels for one series of metric_name (none by default)"""
+        return {}
+
+    def generate(self, generator, shape: Tuple[int, int]) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+
+@register_family
+class NodeFamily(MetricFamily):
+    """Node-level metrics"""
+
+    name = "node"
+    target = "node"
+    metrics = [
+        'kube_node_status_capacity_cpu_cores',
+        'kube_node_status_capacity_memory_bytes',
+        'kube_node_status_condition',
+    ]
+
+    def row_labels(self, topology, metric_name, row):
+        if metric_name == 'kube_node_status_condition':
+            return {'condition': 'Ready'}
+        return {}
+
+    def generate(self, generator, shape):
+        # Node CPU capacity
+        cpu_capacity = np.broadcast_to(generator.topology.node_cpu_capacity[:shape[0], None], shape)
+        return {
+            'kube_node_status_capacity_cpu_cores': np.array(cpu_capacity),
+            # Node memory capacity (in bytes), 4GB per core
+            'kube_node_status_capacity_memory_bytes': cpu_capacity * 4 * GIB,
+            # Node condition (1=Ready, 0=NotReady)
+            'kube_node_status_condition': (generator.rng.random(shape) < 0.99).astype(np.float64),
+        }
+
+
+@register_family
+class CpuFamily(MetricFamily):
+    """CPU usage metrics"""
+
+    name = "cpu"
+    metrics = ['container_cpu_usage_seconds_total', 'container_cpu_cfs_throttled_seconds_total']
+
+    def generate(self, generator, shape):
+        rng = generator.rng
+        return {
+            # CPU usage percentage (0-100)
+            'container_cpu_usage_seconds_total': rng.uniform(5, 95, shape),
+            # CPU throttling
+            'container_cpu_cfs_throttled_seconds_total': rng.integers(0, 1000, shape, endpoint=True).astype(np.float64),
+        }
+
+
+@register_family
+class MemoryFamily(MetricFamily):
+    """Memory metrics"""
+
+    name = "memory"
+    metrics = ['container_memory_usage_bytes', 'container_memory_working_set_bytes', 'container_memory_cache']
+
+    def generate(self, generator, shape):
+        rng = generator.rng
+        # Memory usage in bytes
+        memory_usage = rng.integers(100 * MIB, 8 * GIB, shape, endpoint=True).astype(np.float64)  # 100MB to 8GB
+        return {
+            'container_memory_usage_bytes': memory_usage,
+            # Memory working set
+            'container_memory_working_set_bytes': np.floor(memory_usage * rng.uniform(0.6, 0.9, shape)),
+            # Memory cache
+            'container_memory_cache': np.floor(memory_usage * rng.uniform(0.1, 0.3, shape)),
+        }
+
+
+@register_family
+class NetworkFamily(MetricFamily):
+    """Network metrics"""
+
+    name = "network"
+    metrics = [
+        'container_network_receive_bytes_total',
+        'container_network_transmit_bytes_total',
+        'container_network_receive_errors_total',
+    ]
+
+    def generate(self, generator, shape):
+        rng = generator.rng
+        return {
+            # Network receive bytes, 1MB to 1GB
+            'container_network_receive_bytes_total': rng.integers(1000000, 1000000000, shape, endpoint=True).astype(np.float64),
+            # Network transmit bytes
+            'container_network_transmit_bytes_total': rng.integers(1000000, 1000000000, shape, endpoint=True).astype(np.float64),
+            # Network errors
+            'container_network_receive_errors_total': rng.integers(0, 100, shape, endpoint=True).astype(np.float64),
+        }
+
+
+@register_family
+class DiskFamily(MetricFamily):
+    """Disk I/O metrics"""
+
+    name = "disk"
+    metrics = ['container_fs_reads_bytes_total', 'container_fs_writes_bytes_total']
+
+    def generate(self, generator, shape):
+        rng = generator.rng
+        return {
+            # Disk read bytes
+            'container_fs_reads_bytes_total': rng.integers(1000000, 500000000, shape, endpoint=True).astype(np.float64),
+            # Disk write bytes
+            'container_fs_writes_bytes_total': rng.integers(1000000, 500000000, shape, endpoint=True).astype(np.float64),
+        }
+
+
+@register_family
+class PodFamily(MetricFamily):
+    """Pod-level metrics"""
+
+    name = "pod"
+    metrics = ['kube_pod_status_phase', 'kube_pod_container_status_restarts_total']
+
+    def row_labels(self, topology, metric_name, row):
+        if metric_name == 'kube_pod_status_phase':
+            return {'phase': PHASES[int(topology.pod_phase_codes[row])]}
+        return {}
+
+    def generate(self, generator, shape):
+        topology = generator.topology
+        if topology.restarts:
+            # A counter: constant within an epoch, reset when a rollout replaces the pod
+            restarts = np.array(np.broadcast_to(topology.restarts_at(generator.current_epoch)[:shape[0], None], shape))
+        else:
+            restarts = generator.rng.integers(0, 10, shape, endpoint=True).astype(np.float64)
+        return {
+            # Pod status code; the phase label is fixed per series
+            'kube_pod_status_phase': np.array(np.broadcast_to(topology.pod_phase_codes[:shape[0], None], shape)),
+            # Container restarts
+            'kube_pod_container_status_restarts_total': restarts,
+        }
+
+
+@register_family
+class FilesystemFamily(MetricFamily):
+    """Fake node filesystem metrics for disk usage queries"""
+
+    name = "filesystem"
+    target = "filesystem"
+    metrics = ['node_filesystem_size_bytes', 'node_filesystem_avail_bytes']
+
+    def generate(self, generator, shape):
+        total_bytes = np.broadcast_to(generator.topology.filesystem_size[:shape[0], None], shape)
+        used_ratio = generator.rng.uniform(0.3, 0.9, shape)
+        return {
+            "node_filesystem_size_bytes": np.array(total_bytes),
+            "node_filesystem_avail_bytes": np.floor(total_bytes * (1 - used_ratio)),
+        }
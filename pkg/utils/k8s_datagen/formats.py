@@ -0,0 +1,57 @@
+"""Wire and file formats: remote-write protobuf sizing and OpenMetrics text"""
+
+from typing import Dict, List
+
+
+def varint_size(value: int) -> int:
+    return max(1, (int(value).bit_length() + 6) // 7)
+
+
+def field_size(payload_size: int) -> int:
+    """Size of a length-delimited protobuf field: tag + length prefix + payload."""
+    return 1 + varint_size(payload_size) + payload_size
+
+
+def label_set_size(labels: Dict[str, str]) -> int:
+    """Protobuf size of a TimeSeries' Label fields."""
+    size = 0
+    for name, value in labels.items():
+        size += field_size(field_size(len(name.encode())) + field_size(len(str(value).encode())))
+    return size
+
+
+def sample_size(timestamp: int) -> int:
+    """Protobuf size of one Sample field (double value + int64 timestamp)."""
+    return field_size(9 + 1 + varint_size(timestamp))
+
+
+def remote_write_size(time_series: List[Dict]) -> int:
+    """
+    Exact protobuf size (before snappy) of a remote-write WriteRequest.
+
+    WriteRequest{TimeSeries timeseries=1}, TimeSeries{Label labels=1;
+    Sample samples=2}, Label{string name=1; string value=2},
+    Sample{double value=1; int64 timestamp=2}.
+    """
+    total = 0
+    for series in time_series:
+        size = label_set_size(series['metric'])
+        size += sum(sample_size(timestamp) for timestamp in series['timestamps'])
+        total += field_size(size)
+    return total
+
+
+def escape_label_value(value: str) -> str:
+    """Escape a label value for the OpenMetrics text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def openmetrics_series(labels: Dict[str, str]) -> str:
+    """``name{label="value",...}`` for one label set (including ``__name__``)."""
+    pairs = ','.join(f'{key}="{escape_label_value(value)}"' for key, value in labels.items() if key != '__name__')
+    return f"{labels['__name__']}{{{pairs}}}" if pairs else labels['__name__']
+
+
+def openmetrics_timestamp(timestamp_ms: int) -> str:
+    """OpenMetrics timestamps are seconds; keep millisecond precision."""
+    return f"{timestamp_ms // 1000}.{timestamp_ms % 1000:03d}"
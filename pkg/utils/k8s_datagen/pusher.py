@@ -0,0 +1,878 @@
+"""
+Push generated Kubernetes metrics to Prometheus (remote write, live
+streaming) or export them as OpenMetrics for offline backfill.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from prometheus_remote_writer import RemoteWriter
+except ImportError:
+    RemoteWriter = None
+
+from .config import CHECKPOINT_SETTINGS, MIB, Config
+from .engine import KubernetesMetricsGenerator, SeriesBlock
+from .formats import field_size, label_set_size, openmetrics_series, openmetrics_timestamp, remote_write_size, sample_size
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+# Generator copy owned by each generation worker process
+_worker_generator = None
+
+
+def _init_generator_worker(generator: KubernetesMetricsGenerator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_entries(timestamps: np.ndarray, series_major: bool) -> Tuple[List[Dict], int, float]:
+    """Worker task: one block as remote-write entries, its sample count and generation time."""
+    started = time.perf_counter()
+    entries, samples = [], 0
+    for block in _worker_generator.generate_blocks(timestamps):
+        entries.extend(block.to_remote_write(series_major=series_major))
+        samples += len(block)
+    return entries, samples, time.perf_counter() - started
+
+
+def _export_shard(shard: int, start_ms: int, end_ms: int, interval_ms: int, window: int,
+                  tmp_dir: str) -> Tuple[int, int, Dict[str, str]]:
+    """
+    Worker task: write one time shard as OpenMetrics sample lines, one temp
+    file per metric name, generating ``window`` timestamps at a time so
+    memory stays bounded. Returns (shard, samples written, {metric name: path}).
+    """
+    timestamps = np.arange(start_ms, end_ms + 1, interval_ms, dtype=np.int64)
+    files = {}
+    series_cache = {}
+    samples = 0
+    try:
+        for offset in range(0, len(timestamps), window):
+            for block in _worker_generator.generate_blocks(timestamps[offset:offset + window]):
+                # Label sets only change with rollouts, so format each list once
+                key = id(block.labels)
+                if key not in series_cache:
+                    series_cache = {key: [openmetrics_series(labels) for labels in block.labels]}
+                series = series_cache[key]
+                stamps = [openmetrics_timestamp(t) for t in block.timestamps.tolist()]
+                for row, values in enumerate(block.values.tolist()):
+                    name = block.labels[row]['__name__']
+                    out = files.get(name)
+                    if out is None:
+                        out = files[name] = open(os.path.join(tmp_dir, f"{shard:05d}-{name}.om"), 'w')
+                    prefix = series[row]
+                    out.write(''.join(f"{prefix} {value!r} {stamp}\n" for value, stamp in zip(values, stamps)))
+                samples += len(block)
+    finally:
+        for out in files.values():
+            out.close()
+    return shard, samples, {name: out.name for name, out in files.items()}
+
+
+class SendRateController:
+    """
+    AIMD pacing shared by all sender threads.
+
+    Each send first waits ``delay`` seconds. A failed send, or one slower
+    than ``target_latency``, doubles the delay; a fast one shortens it by a
+    fixed step, so throughput ramps up until the receiver starts pushing back.
+    """
+
+    def __init__(self, target_latency: float, step: float = 0.01, max_delay: float = 5.0):
+        self.target_latency = target_latency
+        self.step = step
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        delay = self.delay
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            if not ok or latency > self.target_latency:
+                self.delay = min(self.max_delay, max(self.delay * 2, self.step))
+            else:
+                self.delay = max(0.0, self.delay - self.step)
+
+
+class PrometheusDataPusher:
+    """Push metrics data to Prometheus using Remote Write API"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        headers = {}
+        if config.auth_token:
+            headers['Authorization'] = f'Bearer {config.auth_token}'
+
+        self.headers = headers if headers else None
+        self._writer = None
+        self.metrics_generator = KubernetesMetricsGenerator(config)
+        self.rate_controller = SendRateController(config.target_latency_seconds)
+        self._stats_lock = threading.Lock()
+        self.stats = self._new_stats()
+        self.checkpoint = None
+        self._last_checkpoint_save = 0.0
+
+    @staticmethod
+    def _new_stats(samples_expected: int = 0) -> Dict:
+        return {
+            'batches': 0, 'failed_batches': 0, 'skipped_batches': 0, 'retries': 0,
+            'samples_sent': 0, 'samples_failed': 0,
+            'samples_expected': samples_expected,
+        }
+
+    @property
+    def writer(self) -> "RemoteWriter":
+        # Created on first use so dry runs and exports work without the remote-write client
+        if self._writer is None:
+            self._writer = self._make_writer()
+        return self._writer
+
+    def _make_writer(self) -> "RemoteWriter":
+        if RemoteWriter is None:
+            print("Error: prometheus-remote-writer not installed. Install it using:")
+            print("pip install prometheus-remote-writer")
+            sys.exit(1)
+        return RemoteWriter(
+            url=self.config.prometheus_url,
+            headers=self.headers,
+            timeout=30
+        )
+
+    def _send_with_retry(self, writer: "RemoteWriter", batch: List[Dict]) -> bool:
+        """Send one batch, retrying with exponential backoff. Returns True once acknowledged."""
+        for attempt in range(self.config.max_retries + 1):
+            self.rate_controller.wait()
+            started = time.perf_counter()
+            try:
+                writer.send(batch)
+            except Exception as e:
+                self.rate_controller.record(time.perf_counter() - started, ok=False)
+                if attempt == self.config.max_retries:
+                    logger.error(f"Error sending batch after {attempt + 1} attempts: {e}")
+                    return False
+                backoff = self.config.retry_backoff_seconds * (2 ** attempt)
+                logger.warning(f"Error sending batch (attempt {attempt + 1}): {e}. Retrying in {backoff:.1f}s")
+                with self._stats_lock:
+                    self.stats['retries'] += 1
+                time.sleep(backoff * random.uniform(0.5, 1.0))
+            else:
+                self.rate_controller.record(time.perf_counter() - started, ok=True)
+                return True
+        return False
+
+    def _checkpoint_settings(self) -> Dict:
+        """Config values that must not change for a resumed run to continue the same data."""
+        return {key: getattr(self.config, key) for key in CHECKPOINT_SETTINGS}
+
+    def save_checkpoint(self, completed: bool = False):
+        """Atomically write the checkpoint file (temp file + rename)."""
+        if self.checkpoint is None:
+            return
+        with self._stats_lock:
+            if completed:
+                self.checkpoint['completed'] = True
+            self.checkpoint['updated_at'] = datetime.now().isoformat()
+            payload = json.dumps(self.checkpoint, indent=2)
+            tmp_path = f"{self.config.checkpoint_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.config.checkpoint_file)
+            self._last_checkpoint_save = time.monotonic()
+
+    def _load_checkpoint(self) -> Dict:
+        """Read the checkpoint and adopt its settings and seed for this run."""
+        with open(self.config.checkpoint_file, 'r') as f:
+            checkpoint = json.load(f)
+
+        for key, value in checkpoint['settings'].items():
+            if getattr(self.config, key) != value:
+                logger.warning(f"Resuming with {key}={value} from the checkpoint (config has {getattr(self.config, key)})")
+                setattr(self.config, key, value)
+        self.config.seed = checkpoint['seed']
+        self.metrics_generator = KubernetesMetricsGenerator(self.config)
+        return checkpoint
+
+    def _new_checkpoint(self, start_ms: int, end_ms: int) -> Dict:
+        interval_ms = self.config.scrape_interval * 1000
+        timestamps = np.arange(start_ms, end_ms + 1, interval_ms, dtype=np.int64)
+        n_shards = max(1, min(self.config.sender_threads, len(timestamps)))
+        return {
+            'start_ms': start_ms,
+            'end_ms': end_ms,
+            'seed': self.metrics_generator.seed,
+            'settings': self._checkpoint_settings(),
+            'completed': False,
+            # acked_ms: last timestamp of the shard whose samples were all acknowledged
+            'shards': [
+                {'start_ms': int(shard[0]), 'end_ms': int(shard[-1]), 'acked_ms': None, 'failed': False}
+                for shard in np.array_split(timestamps, n_shards) if len(shard)
+            ],
+        }
+
+    def _sender(self, shard: int, batches: "queue.Queue"):
+        """
+        Sender thread: drain one shard's queue until the None sentinel.
+
+        After a batch fails for good the rest of the shard is drained without
+        sending: a resume re-sends everything after acked_ms anyway.
+        """
+        writer = self.writer if shard == 0 else self._make_writer()
+        state = self.checkpoint['shards'][shard]
+        while True:
+            item = batches.get()
+            if item is None:
+                return
+            batch, block_end_ms = item
+            if state['failed']:
+                with self._stats_lock:
+                    self.stats['skipped_batches'] += 1
+                continue
+            samples = sum(len(series['values']) for series in batch)
+            ok = self._send_with_retry(writer, batch)
+            with self._stats_lock:
+                if not ok:
+                    # Keep acked_ms at the last gap-free point so a resume re-sends from there
+                    state['failed'] = True
+                elif block_end_ms is not None and not state['failed']:
+                    state['acked_ms'] = block_end_ms
+                save_due = time.monotonic() - self._last_checkpoint_save >= self.config.checkpoint_interval_seconds
+                if ok:
+                    self.stats['batches'] += 1
+                    self.stats['samples_sent'] += samples
+                    total = self.stats['samples_sent']
+                    expected = max(self.stats['samples_expected'], 1)
+                    logger.info(f"Shard {shard}: sent batch {self.stats['batches']} with {samples} metrics. "
+                                f"Total metrics sent: {total}. "
+                                f"Progress: {total / expected * 100:.2f}% "
+                                f"(send delay {self.rate_controller.delay:.2f}s)")
+                else:
+                    self.stats['failed_batches'] += 1
+                    self.stats['samples_failed'] += samples
+            if save_due:
+                self.save_checkpoint()
+
+    def _log_wire_size(self, start_ms: int, interval_ms: int, max_series: int = 2000):
+        """
+        Log protobuf bytes per sample for both layouts over a window of
+        samples_per_series scrapes, whatever layout this run sends.
+
+        Sample values are fixed-width doubles, so sizes depend only on labels
+        and timestamps; an evenly spaced subset of series is measured.
+        """
+        window = max(1, self.config.samples_per_series)
+        timestamps = start_ms + np.arange(window, dtype=np.int64) * interval_ms
+        labels = self.metrics_generator.labels_at(self.metrics_generator.topology.epoch(start_ms))
+        rows = np.unique(np.linspace(0, len(labels) - 1, num=min(max_series, len(labels)), dtype=np.int64))
+        block = SeriesBlock([labels[row] for row in rows], timestamps, np.zeros((len(rows), window)))
+        samples = max(len(block), 1)
+        sample_major = remote_write_size(block.to_remote_write()) / samples
+        series_major = remote_write_size(block.to_remote_write(series_major=True)) / samples
+        logger.info(f"Bytes on wire per sample (protobuf, before snappy): "
+                    f"sample-major {sample_major:.1f}, series-major {series_major:.1f} "
+                    f"({window} samples per series, measured on {len(rows)} of {len(labels)} series)")
+
+    def _check_unfinished_checkpoint(self):
+        """Refuse to overwrite the resume point of an unfinished backfill."""
+        path = self.config.checkpoint_file
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not checkpoint.get('completed'):
+            raise RuntimeError(
+                f"Checkpoint {path} holds an unfinished backfill (last updated {checkpoint.get('updated_at')}). "
+                f"Continue it with --resume, or pass --fresh to discard it and start over"
+            )
+
+    def push_historical_data(self, resume: bool = False, fresh: bool = False):
+        """
+        Generate and push historical data for the specified time range.
+
+        Progress is checkpointed to ``config.checkpoint_file``; with ``resume``
+        the run continues each shard after its last acknowledged block, using
+        the checkpoint's time range, settings and seed. A new run refuses to
+        replace an unfinished checkpoint unless ``fresh`` is set.
+        """
+        if resume:
+            self.checkpoint = self._load_checkpoint()
+            if self.checkpoint.get('completed'):
+                logger.info(f"Checkpoint {self.config.checkpoint_file} is already complete. Nothing to resume")
+                return
+            start_ms, end_ms = self.checkpoint['start_ms'], self.checkpoint['end_ms']
+            for state in self.checkpoint['shards']:
+                state['failed'] = False
+            logger.info(f"Resuming from checkpoint {self.config.checkpoint_file} (seed {self.checkpoint['seed']})")
+        else:
+            if fresh:
+                logger.warning(f"Starting a fresh backfill; discarding checkpoint {self.config.checkpoint_file}")
+            else:
+                self._check_unfinished_checkpoint()
+            end_time = datetime.now()
+            start_time = end_time - timedelta(days=self.config.days_of_history)
+            start_ms = int(start_time.timestamp() * 1000)
+            end_ms = int(end_time.timestamp() * 1000)
+            self.checkpoint = self._new_checkpoint(start_ms, end_ms)
+            self.save_checkpoint()
+
+        logger.info(f"Starting to push historical data from {datetime.fromtimestamp(start_ms / 1000)} "
+                    f"to {datetime.fromtimestamp(end_ms / 1000)}")
+        logger.info(f"Clusters: {self.config.num_clusters}")
+        logger.info(f"Scrape interval: {self.config.scrape_interval} seconds")
+        logger.info(f"Seed: {self.metrics_generator.seed}. Checkpoint: {self.config.checkpoint_file}")
+
+        interval_ms = self.config.scrape_interval * 1000
+        total_intervals = int((end_ms - start_ms) / interval_ms)
+        logger.info(f"Total time intervals to process: {total_intervals}")
+
+        series_count = self.metrics_generator.series_count
+        series_major = self.config.series_major
+        if series_major:
+            # Each request carries samples_per_series samples for as many series as fit in a batch
+            window = max(1, self.config.samples_per_series)
+            entries_per_batch = max(1, self.config.batch_size // window)
+        else:
+            # Generate enough timestamps per vectorized block to fill about one batch
+            window = max(1, self.config.batch_size // max(series_count, 1))
+            entries_per_batch = self.config.batch_size
+        logger.info(f"Series per scrape: {series_count}. Timestamps per generated block: {window}. "
+                    f"Layout: {'series-major' if series_major else 'sample-major'}")
+
+        # Each sender owns one contiguous time shard and a bounded queue; when a
+        # sender falls behind, putting to its queue blocks and stalls generation.
+        # Blocks are aligned to the shard start so a resumed run regenerates
+        # exactly the blocks that were not acknowledged.
+        shards = []
+        for state in self.checkpoint['shards']:
+            shard_timestamps = np.arange(state['start_ms'], state['end_ms'] + 1, interval_ms, dtype=np.int64)
+            blocks = [shard_timestamps[offset:offset + window] for offset in range(0, len(shard_timestamps), window)]
+            if state['acked_ms'] is not None:
+                blocks = [block for block in blocks if block[-1] > state['acked_ms']]
+            shards.append(blocks)
+        n_shards = len(shards)
+        remaining_timestamps = sum(len(block) for blocks in shards for block in blocks)
+        if remaining_timestamps == 0:
+            logger.info("Nothing left to push")
+            self.save_checkpoint(completed=True)
+            return
+
+        self.metrics_generator.topology.origin_epoch = self.metrics_generator.topology.epoch(start_ms)
+        first_block = next(blocks[0] for blocks in shards if blocks)
+        self._log_wire_size(int(first_block[0]), interval_ms)
+
+        queues = [queue.Queue(maxsize=max(1, self.config.queue_size)) for _ in shards]
+        self.stats = self._new_stats(series_count * remaining_timestamps)
+        senders = [
+            threading.Thread(target=self._sender, args=(shard, queues[shard]), daemon=True)
+            for shard in range(n_shards)
+        ]
+        for sender in senders:
+            sender.start()
+
+        # Interleave shards so every sender has work from the start. Blocks of a
+        # shard that has already failed are not generated (see _sender)
+        tasks = [
+            (shard, blocks[index])
+            for index in range(max(len(blocks) for blocks in shards))
+            for shard, blocks in enumerate(shards)
+            if index < len(blocks)
+        ]
+        logger.info(f"Senders: {n_shards}. Generator processes: {self.config.generator_processes}. "
+                    f"Blocks to generate: {len(tasks)}")
+
+        generation_seconds = 0.0
+        samples_generated = 0
+        started = time.perf_counter()
+
+        def dispatch(shard: int, block_timestamps: np.ndarray, entries: List[Dict]):
+            # Batches never span blocks; the block's last batch acknowledges it
+            for offset in range(0, len(entries), entries_per_batch):
+                is_last = offset + entries_per_batch >= len(entries)
+                block_end_ms = int(block_timestamps[-1]) if is_last else None
+                queues[shard].put((entries[offset:offset + entries_per_batch], block_end_ms))
+
+        if self.config.generator_processes > 0:
+            with ProcessPoolExecutor(
+                max_workers=self.config.generator_processes,
+                initializer=_init_generator_worker,
+                initargs=(self.metrics_generator,),
+            ) as pool:
+                in_flight = deque()
+                max_in_flight = 2 * self.config.generator_processes
+                for shard, block_timestamps in tasks:
+                    if self.checkpoint['shards'][shard]['failed']:
+                        continue
+                    future = pool.submit(_generate_entries, block_timestamps, series_major)
+                    in_flight.append((shard, block_timestamps, future))
+                    while len(in_flight) >= max_in_flight or (in_flight and in_flight[0][2].done()):
+                        done_shard, done_timestamps, future = in_flight.popleft()
+                        entries, samples, seconds = future.result()
+                        generation_seconds += seconds
+                        samples_generated += samples
+                        dispatch(done_shard, done_timestamps, entries)
+                while in_flight:
+                    done_shard, done_timestamps, future = in_flight.popleft()
+                    entries, samples, seconds = future.result()
+                    generation_seconds += seconds
+                    samples_generated += samples
+                    dispatch(done_shard, done_timestamps, entries)
+        else:
+            _init_generator_worker(self.metrics_generator)
+            for shard, block_timestamps in tasks:
+                if self.checkpoint['shards'][shard]['failed']:
+                    continue
+                entries, samples, seconds = _generate_entries(block_timestamps, series_major)
+                generation_seconds += seconds
+                samples_generated += samples
+                dispatch(shard, block_timestamps, entries)
+
+        for batches in queues:
+            batches.put(None)
+        for sender in senders:
+            sender.join()
+        elapsed = time.perf_counter() - started
+
+        failed = any(state['failed'] for state in self.checkpoint['shards'])
+        self.save_checkpoint(completed=not failed)
+        if failed:
+            logger.warning("Some batches failed; run again with --resume to re-send from the last acknowledged point")
+
+        if generation_seconds > 0:
+            logger.info(f"Generated {samples_generated:,} samples in {generation_seconds:.2f}s of worker time "
+                        f"({samples_generated / generation_seconds:,.0f} samples/sec per worker)")
+        logger.info(f"Completed! Total metrics sent: {self.stats['samples_sent']} in {self.stats['batches']} batches "
+                    f"in {elapsed:.1f}s ({self.stats['samples_sent'] / max(elapsed, 1e-9):,.0f} samples/sec). "
+                    f"Retries: {self.stats['retries']}. Failed batches: {self.stats['failed_batches']} "
+                    f"({self.stats['samples_failed']} metrics). "
+                    f"Batches skipped after a shard failed: {self.stats['skipped_batches']}")
+
+        logger.info(f"Total time series cardinality: {self.metrics_generator.distinct_series(start_ms, end_ms):,}")
+
+    def dry_run(self) -> Dict:
+        """
+        Report what a backfill of days_of_history would produce without
+        generating or sending it: exact series counts, samples, and estimated
+        bytes for each output (protobuf sizes are before snappy compression).
+        """
+        generator = self.metrics_generator
+        end_ms = int(datetime.now().timestamp() * 1000)
+        start_ms = end_ms - self.config.days_of_history * 86400 * 1000
+        scrapes = len(range(start_ms, end_ms + 1, self.config.scrape_interval * 1000))
+        generator.topology.origin_epoch = generator.topology.epoch(start_ms)
+        series_per_scrape = generator.series_count
+        samples = series_per_scrape * scrapes
+
+        # Remote-write bytes from the exact label encoding of every series
+        per_sample = sample_size(end_ms)
+        per_series = self.config.samples_per_series
+        full_chunks, remainder = divmod(scrapes, per_series)
+        sample_major = series_major = openmetrics = 0
+        for labels in generator.series_labels:
+            label_bytes = label_set_size(labels)
+            sample_major += field_size(label_bytes + per_sample) * scrapes
+            series_major += field_size(label_bytes + per_sample * per_series) * full_chunks
+            if remainder:
+                series_major += field_size(label_bytes + per_sample * remainder)
+            openmetrics += len(openmetrics_series(labels).encode()) * scrapes
+
+        # OpenMetrics value widths vary with the data; measure them on one scrape
+        block = generator.generate_block([end_ms])
+        value_chars = sum(len(repr(value)) for value in block.values[:, 0].tolist())
+        openmetrics += (value_chars + series_per_scrape * (len(openmetrics_timestamp(end_ms)) + 3)) * scrapes
+
+        report = {
+            'series_per_scrape': series_per_scrape,
+            'distinct_series': generator.distinct_series(start_ms, end_ms),
+            'scrapes': scrapes,
+            'samples': samples,
+            'remote_write_bytes_sample_major': sample_major,
+            'remote_write_bytes_series_major': series_major,
+            'openmetrics_bytes': openmetrics,
+        }
+        logger.info(f"Dry run for {self.config.days_of_history} days at {self.config.scrape_interval}s "
+                    f"({', '.join(family.name for family in generator.families)} families)")
+        logger.info(f"Series per scrape: {series_per_scrape:,}. Distinct series over the range: "
+                    f"{report['distinct_series']:,}. Scrapes: {scrapes:,}. Samples: {samples:,}")
+        logger.info(f"Remote write (protobuf, before snappy): sample-major {sample_major / MIB:,.1f} MiB "
+                    f"({sample_major / max(samples, 1):.1f} B/sample), series-major "
+                    f"{series_major / MIB:,.1f} MiB ({series_major / max(samples, 1):.1f} B/sample)")
+        logger.info(f"OpenMetrics export: ~{openmetrics / MIB:,.1f} MiB")
+        return report
+
+    def _live_sender(self, batches: "queue.Queue", live: Dict):
+        """Live-mode sender thread: send batches and record latency and scrape lag."""
+        writer = self._make_writer()
+        while True:
+            item = batches.get()
+            if item is None:
+                return
+            batch, tick_ms, last_in_tick = item
+            started = time.perf_counter()
+            try:
+                ok = self._send_with_retry(writer, batch)
+            except Exception:
+                # Count the batch as failed but keep draining, or push_live blocks on a full queue
+                logger.exception("Unexpected error sending live batch")
+                ok = False
+            latency = time.perf_counter() - started
+            with self._stats_lock:
+                live['latencies'].append(latency)
+                if ok:
+                    live['samples_sent'] += len(batch)
+                else:
+                    live['samples_failed'] += len(batch)
+                if last_in_tick:
+                    # Time from the scrape timestamp until its last sample was acknowledged
+                    live['lags'].append(time.time() - tick_ms / 1000)
+
+    def push_live(self, duration: Optional[float] = None, target_rate: Optional[float] = None):
+        """
+        Stream samples in real time, one scrape every scrape_interval aligned to the wall clock.
+
+        With ``target_rate`` (samples/sec) each scrape's batches are spread
+        evenly instead of being sent in one burst. Throughput, scrape lag and
+        send latency percentiles are logged after every scrape. Runs until
+        ``duration`` seconds have passed, or forever.
+        """
+        interval = self.config.scrape_interval
+        series_count = self.metrics_generator.series_count
+        natural_rate = series_count / interval
+        logger.info(f"Live mode: {series_count} series every {interval}s ({natural_rate:,.0f} samples/sec)")
+        if target_rate and target_rate > natural_rate:
+            logger.warning(f"Target rate {target_rate:,.0f} samples/sec exceeds the {natural_rate:,.0f} samples/sec "
+                           f"this topology produces; raise the cluster sizes or lower scrape_interval")
+
+        self.stats = self._new_stats()
+        live = {'latencies': deque(maxlen=10000), 'lags': deque(maxlen=1000), 'samples_sent': 0, 'samples_failed': 0}
+        batches = queue.Queue(maxsize=max(1, self.config.queue_size))
+        senders = [
+            threading.Thread(target=self._live_sender, args=(batches, live), daemon=True)
+            for _ in range(max(1, self.config.sender_threads))
+        ]
+        for sender in senders:
+            sender.start()
+
+        started = time.time()
+        self.metrics_generator.topology.origin_epoch = self.metrics_generator.topology.epoch(started * 1000)
+        next_tick = math.ceil(started / interval) * interval
+        scrapes = 0
+        try:
+            while duration is None or next_tick < started + duration:
+                time.sleep(max(0.0, next_tick - time.time()))
+                tick_ms = int(next_tick * 1000)
+                entries = []
+                for block in self.metrics_generator.generate_blocks([tick_ms]):
+                    entries.extend(block.to_remote_write())
+
+                for offset in range(0, len(entries), self.config.batch_size):
+                    if target_rate:
+                        # Pace batches so this scrape is sent at target_rate
+                        time.sleep(max(0.0, next_tick + offset / target_rate - time.time()))
+                    last_in_tick = offset + self.config.batch_size >= len(entries)
+                    batches.put((entries[offset:offset + self.config.batch_size], tick_ms, last_in_tick))
+
+                scrapes += 1
+                self._log_live_stats(live, scrapes, started, target_rate)
+                next_tick += interval
+        finally:
+            for _ in senders:
+                try:
+                    batches.put_nowait(None)
+                except queue.Full:
+                    pass
+            for sender in senders:
+                sender.join(timeout=self.config.target_latency_seconds * 10)
+            self._log_live_stats(live, scrapes, started, target_rate, final=True)
+
+    def _log_live_stats(self, live: Dict, scrapes: int, started: float, target_rate: Optional[float],
+                        final: bool = False):
+        with self._stats_lock:
+            latencies = np.array(live['latencies']) * 1000
+            lags = np.array(live['lags'])
+            sent, failed = live['samples_sent'], live['samples_failed']
+        elapsed = max(time.time() - started, 1e-9)
+        message = (f"{'Finished' if final else 'Scrape'} {scrapes}: sent {sent:,} samples "
+                   f"({failed:,} failed), {sent / elapsed:,.0f} samples/sec"
+                   f"{f' (target {target_rate:,.0f})' if target_rate else ''}")
+        if len(lags):
+            message += f". Lag p50/p99: {np.percentile(lags, 50):.2f}s/{np.percentile(lags, 99):.2f}s"
+        if len(latencies):
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            message += f". Send latency p50/p90/p99: {p50:.0f}/{p90:.0f}/{p99:.0f} ms"
+        logger.info(message)
+
+    def export_openmetrics(self, output_path: str):
+        """
+        Write the historical range to an OpenMetrics file instead of pushing it.
+
+        The result can be imported without a running server using
+        ``promtool tsdb create-blocks-from openmetrics <file> <data dir>``.
+        The range is split into time shards written in parallel by
+        generator_processes workers, each into per-metric temp files; those
+        are concatenated in time order under one ``# TYPE`` line per metric.
+        """
+        end_ms = int(datetime.now().timestamp() * 1000)
+        start_ms = end_ms - self.config.days_of_history * 86400 * 1000
+        interval_ms = self.config.scrape_interval * 1000
+        timestamps = np.arange(start_ms, end_ms + 1, interval_ms, dtype=np.int64)
+        window = max(1, self.config.samples_per_series)
+        processes = max(1, self.config.generator_processes)
+        # Several shards per process keeps workers busy until the end
+        shards = [shard for shard in np.array_split(timestamps, min(processes * 4, len(timestamps))) if len(shard)]
+        metric_names = list(dict.fromkeys(labels['__name__'] for labels in self.metrics_generator.series_labels))
+        self.metrics_generator.topology.origin_epoch = self.metrics_generator.topology.epoch(start_ms)
+
+        logger.info(f"Exporting {len(timestamps)} scrapes of {self.metrics_generator.series_count} series "
+                    f"to {output_path} in {len(shards)} shards on {processes} processes")
+        started = time.perf_counter()
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        tmp_dir = tempfile.mkdtemp(prefix='openmetrics-', dir=output_dir)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_generator_worker,
+                initargs=(self.metrics_generator,),
+            ) as pool:
+                futures = [
+                    pool.submit(_export_shard, index, int(shard[0]), int(shard[-1]), interval_ms, window, tmp_dir)
+                    for index, shard in enumerate(shards)
+                ]
+                results = sorted(future.result() for future in futures)
+                samples = sum(result[1] for result in results)
+            logger.info(f"Generated {samples:,} samples in {time.perf_counter() - started:.1f}s; concatenating")
+
+            tmp_output = f"{output_path}.tmp"
+            with open(tmp_output, 'wb') as out:
+                for name in metric_names:
+                    out.write(f"# TYPE {name} gauge\n".encode())
+                    for _, _, paths in results:
+                        if name in paths:
+                            with open(paths[name], 'rb') as part:
+                                shutil.copyfileobj(part, out, 16 * MIB)
+                            os.remove(paths[name])
+                out.write(b"# EOF\n")
+            os.replace(tmp_output, output_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(output_path)
+        logger.info(f"Wrote {samples:,} samples ({size / MIB:,.1f} MiB) to {output_path} in {elapsed:.1f}s "
+                    f"({samples / max(elapsed, 1e-9):,.0f} samples/sec)")
+        logger.info(f"Import with: promtool tsdb create-blocks-from openmetrics {output_path} <prometheus data dir>")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Push high-cardinality Kubernetes metrics to Prometheus'
+    )
+    parser.add_argument(
+        '--config',
+        type=str,
+        help='Path to JSON configuration file'
+    )
+    parser.add_argument(
+        '--url',
+        type=str,
+        help='Prometheus remote write URL (e.g., http://localhost:9090/api/v1/write)'
+    )
+    parser.add_argument(
+        '--clusters',
+        type=int,
+        default=10,
+        help='Number of Kubernetes clusters to simulate (default: 10)'
+    )
+    parser.add_argument(
+        '--days',
+        type=int,
+        default=365,
+        help='Number of days of historical data (default: 365)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1000,
+        help='Number of metrics per batch (default: 1000)'
+    )
+    parser.add_argument(
+        '--scrape-interval',
+        type=int,
+        default=30,
+        help='Scrape interval in seconds (default: 30)'
+    )
+
+    parser.add_argument(
+        '--senders',
+        type=int,
+        default=None,
+        help='Number of concurrent sender threads, one per time shard (default: 4)'
+    )
+    parser.add_argument(
+        '--generator-processes',
+        type=int,
+        default=None,
+        help='Worker processes generating metrics, 0 to generate in-process (default: 2)'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        type=str,
+        default=None,
+        help='Checkpoint file for resumable backfills (default: prometheus_pusher_checkpoint.json)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue the backfill recorded in the checkpoint file'
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='Start a new backfill even if the checkpoint file holds an unfinished one'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Seed for series identities and values (default: random, stored in the checkpoint)'
+    )
+    parser.add_argument(
+        '--live',
+        action='store_true',
+        help='Stream samples in real time every scrape interval instead of backfilling history'
+    )
+    parser.add_argument(
+        '--target-rate',
+        type=float,
+        default=None,
+        help='Samples per second to pace live mode at (default: send each scrape at once)'
+    )
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=None,
+        help='Seconds to run live mode for (default: until interrupted)'
+    )
+    parser.add_argument(
+        '--export-openmetrics',
+        type=str,
+        default=None,
+        metavar='FILE',
+        help='Write the history to an OpenMetrics file for promtool instead of pushing it'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report exact series and sample counts and estimated bytes, then exit without sending'
+    )
+    parser.add_argument(
+        '--families',
+        type=str,
+        default=None,
+        help='Comma-separated metric families to generate (default: all registered families)'
+    )
+    parser.add_argument(
+        '--series-major',
+        action='store_true',
+        help='Send many samples per time series instead of one sample per series'
+    )
+    parser.add_argument(
+        '--samples-per-series',
+        type=int,
+        default=None,
+        help='Samples per series in each request when --series-major is set (default: 120)'
+    )
+
+    args = parser.parse_args()
+
+    # Load configuration
+    if args.config:
+        config = Config(config_file=args.config)
+    elif args.url:
+        config = Config(prometheus_url=args.url)
+        config.num_clusters = args.clusters
+        config.days_of_history = args.days
+        config.batch_size = args.batch_size
+        config.scrape_interval = args.scrape_interval
+    else:
+        logger.error("Either --config or --url must be provided")
+        parser.print_help()
+        sys.exit(1)
+
+    if args.series_major:
+        config.series_major = True
+    if args.samples_per_series:
+        config.samples_per_series = args.samples_per_series
+    if args.senders:
+        config.sender_threads = args.senders
+    if args.generator_processes is not None:
+        config.generator_processes = args.generator_processes
+    if args.checkpoint:
+        config.checkpoint_file = args.checkpoint
+    if args.seed is not None:
+        config.seed = args.seed
+    if args.resume and args.fresh:
+        logger.error("--resume and --fresh cannot be used together")
+        sys.exit(1)
+    if args.families:
+        config.metric_families = [name.strip() for name in args.families.split(',') if name.strip()]
+
+    # Create pusher and start pushing data
+    try:
+        pusher = PrometheusDataPusher(config)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    try:
+        if args.dry_run:
+            pusher.dry_run()
+        elif args.live:
+            pusher.push_live(duration=args.duration, target_rate=args.target_rate)
+        elif args.export_openmetrics:
+            pusher.export_openmetrics(args.export_openmetrics)
+        else:
+            pusher.push_historical_data(resume=args.resume, fresh=args.fresh)
+    except KeyboardInterrupt:
+        if args.live:
+            logger.info("Interrupted by user. Exiting...")
+            sys.exit(0)
+        pusher.save_checkpoint()
+        logger.info(f"\\nInterrupted by user. Progress saved to {config.checkpoint_file}; "
+                    f"continue with --resume. Exiting...")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Error during execution: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""Seeded Kubernetes inventory the generated series are built from"""
+
+import random
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .config import GIB, Config
+
+
+class ClusterTopology:
+    """
+    Fixed Kubernetes inventory drawn once from a seeded random.Random.
+
+    Each cluster has one region and environment; nodes, pods and containers
+    are assigned once, so every scrape reports the same series. Optional
+    churn is a pure function of the epoch index (timestamp // churn epoch):
+    a rollout replaces a pod (new pod-template hash, bumped version) and
+    restarts advance the container restart counter. Any block can therefore
+    be regenerated in isolation.
+    """
+
+    regions = ['us-east-1', 'us-west-2', 'eu-west-1', 'ap-south-1', 'ap-southeast-1']
+    environments = ['production', 'staging', 'development', 'qa']
+    namespaces = ['default', 'kube-system', 'monitoring', 'logging', 'istio-system',
+                  'ingress-nginx', 'cert-manager', 'mysql', 'redis', 'kafka',
+                  'app-backend', 'app-frontend', 'app-api', 'app-worker', 'app-scheduler']
+    container_names = ['app', 'sidecar', 'init', 'proxy', 'metrics-exporter',
+                       'log-collector', 'cache', 'database', 'queue', 'worker']
+
+    def __init__(self, config: Config, seed: int):
+        self.config = config
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.clusters: List[Dict[str, str]] = []
+        self.node_labels: List[Dict[str, str]] = []
+        self.filesystem_labels: List[Dict[str, str]] = []
+        self.pods: List[Dict] = []
+        self.container_labels: List[Dict[str, str]] = []
+        self.container_pod: List[int] = []
+        node_cpu_capacity = []
+        filesystem_size = []
+        pod_phase_codes = []
+
+        for cluster in self._generate_cluster_names():
+            region = self.random.choice(self.regions)
+            environment = self.random.choice(self.environments)
+            self.clusters.append({'cluster': cluster, 'region': region, 'environment': environment})
+
+            # Node labels
+            for node_id in range(1, config.nodes_per_cluster + 1):
+                node_labels = {
+                    'cluster': cluster,
+                    'node': self._generate_node_name(cluster, node_id),
+                    'region': region,
+                    'environment': environment,
+                    'instance_type': self.random.choice(['t3.large', 't3.xlarge', 'm5.large', 'm5.xlarge', 'c5.2xlarge'])
+                }
+                self.node_labels.append(node_labels)
+                node_cpu_capacity.append(self.random.choice([4, 8, 16, 32, 64]))
+
+                for mount in ["/", "/var/lib", "/data"]:
+                    self.filesystem_labels.append({
+                        **node_labels,
+                        "mountpoint": mount,
+                        "fstype": self.random.choice(["ext4", "xfs"]),
+                    })
+                    filesystem_size.append(self.random.randint(50, 500) * GIB)  # 50–500 GB
+
+            # Pod and container labels
+            for namespace in self.namespace_names(config.namespaces_per_cluster):
+                for pod_id in range(1, config.pods_per_namespace + 1):
+                    app_name, template_hash = self._generate_pod_identity()
+                    node_name = self._generate_node_name(cluster, self.random.randint(1, max(config.nodes_per_cluster, 1)))
+                    # Pod status (0=Pending, 1=Running, 2=Succeeded, 3=Failed)
+                    pod_status = self.random.choice([1, 1, 1, 1, 1, 0, 2])  # Mostly running
+                    pod_index = len(self.pods)
+                    self.pods.append({'app': app_name, 'hash': template_hash, 'pod_id': pod_id})
+
+                    for container_id in range(1, config.containers_per_pod + 1):
+                        container_name = self.random.choice(self.container_names)
+                        self.container_labels.append({
+                            'cluster': cluster,
+                            'namespace': namespace,
+                            'pod': f"{app_name}-{template_hash}-{pod_id}",
+                            'container': f"{container_name}-{container_id}",
+                            'node': node_name,
+                            'region': region,
+                            'environment': environment,
+                            'app': app_name,
+                            'version': f"v{self.random.randint(1, 5)}.{self.random.randint(0, 10)}.{self.random.randint(0, 20)}"
+                        })
+                        self.container_pod.append(pod_index)
+                        pod_phase_codes.append(pod_status)
+
+        self.node_cpu_capacity = np.array(node_cpu_capacity, dtype=np.float64)
+        self.filesystem_size = np.array(filesystem_size, dtype=np.float64)
+        self.pod_phase_codes = np.array(pod_phase_codes, dtype=np.float64)
+        self.container_pod = np.array(self.container_pod, dtype=np.int64)
+        self._draw_churn()
+
+    def namespace_names(self, count: int) -> List[str]:
+        """The well-known namespaces first, then generated app namespaces as needed"""
+        extra = [f"app-namespace-{i:03d}" for i in range(1, count - len(self.namespaces) + 1)]
+        return (self.namespaces + extra)[:count]
+
+    def labels(self, target: str) -> List[Dict[str, str]]:
+        """Base label sets for a family target: node, container or filesystem"""
+        return {
+            'node': self.node_labels,
+            'container': self.container_labels,
+            'filesystem': self.filesystem_labels,
+        }[target]
+
+    def _generate_cluster_names(self) -> List[str]:
+        """Generate cluster names"""
+        return [f"k8s-cluster-{i:03d}" for i in range(1, self.config.num_clusters + 1)]
+
+    def _generate_node_name(self, cluster: str, node_id: int) -> str:
+        """Generate node name"""
+        return f"{cluster}-node-{node_id:04d}"
+
+    def _generate_pod_identity(self) -> Tuple[str, int]:
+        """Draw a pod's app name and initial pod-template hash"""
+        app_name = self.random.choice(['nginx', 'api', 'worker', 'cache', 'db', 'frontend', 'backend'])
+        return app_name, self.random.randint(100000, 999999)
+
+    def _draw_churn(self):
+        # Churn parameters use their own stream so enabling churn never changes the inventory
+        rng = np.random.default_rng([self.seed, 1])
+        n_pods, n_containers = len(self.pods), len(self.container_labels)
+        self.epoch_ms = max(1, int(self.config.churn_epoch_seconds * 1000))
+        self.rollouts = self.config.rollout_probability > 0
+        self.restarts = self.config.pod_restart_probability > 0
+
+        # Each pod is rolled every rollout_period epochs (about 1 / rollout_probability,
+        # jittered so pods do not roll in lockstep), offset by a random phase
+        if self.rollouts:
+            mean_period = 1.0 / min(1.0, self.config.rollout_probability)
+            self.rollout_period = np.maximum(1, np.rint(mean_period * rng.uniform(0.75, 1.25, n_pods))).astype(np.int64)
+        else:
+            self.rollout_period = np.ones(n_pods, dtype=np.int64)
+        self.rollout_phase = (rng.random(n_pods) * self.rollout_period).astype(np.int64)
+        # Each container restarts restart_rate times per epoch on average
+        self.restart_rate = rng.exponential(self.config.pod_restart_probability or 1.0, n_containers)
+        self.restart_offset = rng.random(n_containers)
+        # Restart counters of pods that predate the generated range start at this epoch
+        self.origin_epoch = 0
+
+    @property
+    def churn(self) -> bool:
+        return self.rollouts or self.restarts
+
+    def epoch(self, timestamp_ms: int) -> int:
+        return int(timestamp_ms) // self.epoch_ms
+
+    def pod_revisions(self, epoch: int) -> np.ndarray:
+        """Rollout revision of every pod at the given epoch (0 = original pod)"""
+        if not self.rollouts:
+            return np.zeros(len(self.pods), dtype=np.int64)
+        return (epoch + self.rollout_phase) // self.rollout_period
+
+    def container_labels_at(self, epoch: int) -> List[Dict[str, str]]:
+        """Container label sets at an epoch; pods replaced by a rollout get a new name and version."""
+        revisions = self.pod_revisions(epoch)
+        labels = list(self.container_labels)
+        for row, pod_index in enumerate(self.container_pod):
+            revision = int(revisions[pod_index])
+            if revision == 0:
+                continue
+            pod = self.pods[pod_index]
+            template_hash = random.Random(f"{self.seed}-{pod_index}-{revision}").randint(100000, 999999)
+            base = labels[row]
+            major, minor, patch = base['version'][1:].split('.')
+            labels[row] = {
+                **base,
+                'pod': f"{pod['app']}-{template_hash}-{pod['pod_id']}",
+                'version': f"v{major}.{minor}.{int(patch) + revision}",
+            }
+        return labels
+
+    def restarts_at(self, epoch: int) -> np.ndarray:
+        """Restart counter of every container since its pod's current revision started"""
+        revision_start = self.pod_revisions(epoch) * self.rollout_period - self.rollout_phase
+        if not self.rollouts:
+            revision_start = np.zeros(len(self.pods), dtype=np.int64)
+        age = np.maximum(epoch - np.maximum(revision_start, self.origin_epoch), 0)[self.container_pod]
+        return np.floor(age * self.restart_rate + self.restart_offset)
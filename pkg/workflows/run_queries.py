@@ -1,15 +1,15 @@
 import yaml, importlib
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
 def load_yaml(path): return yaml.safe_load(open(path))
 
-def run_workflow(query_set_path, prom_config_path, copilot_mode_module, output_dir="test/output/"):
-    queries = load_yaml(query_set_path)['queries']
-    prom_config = load_yaml(prom_config_path)
-    copilot = importlib.import_module(copilot_mode_module)
-
-    result = {}
+def expand_runs(queries):
+    """(run label, query text) for every query and repeat, in query-set order."""
+    runs = []
     for q in queries:
         if isinstance(q, dict):
             query_text = q.get('text', '')
@@ -20,23 +20,102 @@ def run_workflow(query_set_path, prom_config_path, copilot_mode_module, output_d
 
         for i in range(repeat_times):
             run_label = f"{query_text} (run {i+1})" if repeat_times > 1 else query_text
-            try:
-                answer = copilot.run(query_text, prom_config)
-                if isinstance(answer, dict):
-                    answer = dict(answer)  # shallow copy
-                    if "ollama_response" in answer:
-                        ollama_response = answer.pop("ollama_response")
-                        answer = {"ollama_response": ollama_response, **answer}
-                    if "final_answer" in answer:
-                        final_answer = answer.pop("final_answer")
-                        answer = {"final": final_answer, **answer}
-                result[run_label] = answer
-            except Exception as e:
-                result[run_label] = {"error": str(e)}
+            runs.append((run_label, query_text))
+    return runs
+
+def format_answer(answer):
+    if isinstance(answer, dict):
+        answer = dict(answer)  # shallow copy
+        if "ollama_response" in answer:
+            ollama_response = answer.pop("ollama_response")
+            answer = {"ollama_response": ollama_response, **answer}
+        if "final_answer" in answer:
+            final_answer = answer.pop("final_answer")
+            answer = {"final": final_answer, **answer}
+    return answer
+
+def _run_query(copilot, index, query_text, prom_config, done):
+    """Daemon-thread body: run one query and report (index, answer) on done."""
+    try:
+        answer = format_answer(copilot.run(query_text, prom_config))
+    except Exception as e:
+        answer = {"error": str(e)}
+    done.put((index, answer))
+
+def run_workflow(query_set_path, prom_config_path, copilot_mode_module, output_dir="test/output/", workers=1, timeout=None):
+    """
+    Run every query (and repeat) of a query set through the copilot.
+
+    Up to ``workers`` queries run at once, each in its own daemon thread.
+    ``timeout`` bounds each query from the moment it starts; a query that
+    runs over is recorded as an error and abandoned, and its slot goes to
+    the next query, so a hung query never delays the rest of the run.
+    Results are appended to the output file in query-set order as soon as
+    each one and all before it are done, so a crash keeps every completed
+    answer.
+    """
+    queries = load_yaml(query_set_path)['queries']
+    prom_config = load_yaml(prom_config_path)
+    copilot = importlib.import_module(copilot_mode_module)
+
+    # Let the copilot batch any per-question setup (e.g. embeddings) up front
+    if hasattr(copilot, "prepare"):
+        copilot.prepare([q.get('text', '') if isinstance(q, dict) else q for q in queries])
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     name = Path(query_set_path).stem
     output_file = Path(output_dir) / f"{name}_{timestamp}.yaml"
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    output_file.write_text(yaml.dump(result))
+
+    runs = expand_runs(queries)
+    workers = max(int(workers), 1)
+    done = queue.Queue()
+    started_at = {}  # index -> start time, for queries still running
+    results = {}
+    next_to_start = 0
+    next_to_write = 0
+
+    started = time.monotonic()
+    try:
+        with open(output_file, "w") as output:
+            while next_to_write < len(runs):
+                while len(started_at) < workers and next_to_start < len(runs):
+                    threading.Thread(
+                        target=_run_query,
+                        args=(copilot, next_to_start, runs[next_to_start][1], prom_config, done),
+                        name=f"query-runner-{next_to_start}",
+                        daemon=True,
+                    ).start()
+                    started_at[next_to_start] = time.monotonic()
+                    next_to_start += 1
+
+                if next_to_write in results:
+                    run_label = runs[next_to_write][0]
+                    output.write(yaml.dump({run_label: results.pop(next_to_write)}))
+                    output.flush()
+                    next_to_write += 1
+                    print(f"[INFO] {next_to_write}/{len(runs)} queries done ({time.monotonic() - started:.1f}s)")
+                    continue
+
+                wait = None
+                if timeout is not None:
+                    wait = max(0.0, min(started_at.values()) + timeout - time.monotonic())
+                try:
+                    index, answer = done.get(timeout=wait)
+                    # Answers of queries that already timed out are dropped
+                    if started_at.pop(index, None) is not None:
+                        results[index] = answer
+                except queue.Empty:
+                    pass
+
+                if timeout is not None:
+                    now = time.monotonic()
+                    for index, query_started in list(started_at.items()):
+                        if now - query_started >= timeout:
+                            del started_at[index]
+                            results[index] = {"error": f"Timed out after {timeout}s"}
+    except KeyboardInterrupt:
+        print(f"[INFO] Interrupted; completed results saved to {output_file}")
+        raise
+
     print(f"[INFO] Results saved to {output_file}")